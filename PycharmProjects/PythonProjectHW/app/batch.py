@@ -0,0 +1,189 @@
+"""Streaming bulk evaluation for ``cli batch``.
+
+Records flow through generators (read -> parse -> compute -> log -> write), so memory
+stays bounded by the chunks in flight no matter how long the input is.
+"""
+import csv
+import json
+from collections import deque
+from datetime import datetime
+
+from app.math_ops import power, power_variant, fibonacci, factorial, fibonacci_mod, factorial_mod
+from app.cache import result_cache
+from app.cost import check_budget, BudgetError
+from app.db import insert_logs
+from app.lookup import lookup_table
+from app.streaming import int_to_str
+
+INPUT_FORMATS = ("jsonl", "csv")
+# operation -> (argument names, function)
+BATCH_OPERATIONS = {
+    "power": (("x", "y"), power),
+    "fibonacci": (("n",), fibonacci),
+    "factorial": (("n",), factorial),
+    "fibonacci_mod": (("n", "modulus"), fibonacci_mod),
+    "factorial_mod": (("n", "modulus"), factorial_mod),
+}
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_LOG_BATCH = 10000
+
+
+def read_records(lines, input_format: str):
+    """Yield (line number, dict or error message) for each non-blank record."""
+    if input_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if value not in (None, "")}
+        return
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _integer(record: dict, name: str) -> int:
+    # JSON ints, or the digits of one in a CSV cell; int() would also take 2.7, None or true.
+    value = record[name]
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"{name} must be an integer, got {json.dumps(value)}")
+
+
+def parse_record(record: dict) -> tuple:
+    """(operation, function, args, logged input) for a record; raises ValueError if it is not one."""
+    operation = record.get("operation")
+    if operation not in BATCH_OPERATIONS:
+        raise ValueError(f"Unknown operation: {operation}")
+    names, func = BATCH_OPERATIONS[operation]
+    try:
+        args = tuple(_integer(record, name) for name in names)
+    except KeyError as e:
+        raise ValueError(f"{operation} needs {', '.join(names)}; missing {e.args[0]}") from None
+    input_data = ",".join(f"{name}={value}" for name, value in zip(names, args))
+    mode = record.get("mode", "exact")
+    if operation == "power" and mode != "exact":
+        extra = {name: _integer(record, name) for name in ("modulus", "digits") if name in record}
+        args += (mode, extra.get("modulus"), extra.get("digits"))
+        func = power_variant
+        input_data += f",mode={mode}" + "".join(f",{name}={value}" for name, value in extra.items())
+    return operation, func, args, input_data
+
+
+def evaluate(job: tuple) -> tuple:
+    """(result, None) or (None, error message) for one (operation, function, args) job.
+
+    None stands for a record that failed to parse; it passes through as (None, None).
+    A record the math itself rejects, like 0 ** -1, is an error line too, not the end of the run.
+    """
+    if job is None:
+        return None, None
+    operation, func, args = job
+    try:
+        check_budget(operation, args)
+        result = lookup_table.get(operation, args[0])
+        if result is None:
+            result = result_cache.get_or_compute(operation, args, func)
+    except (BudgetError, ValueError, TypeError, ArithmeticError) as e:
+        return None, str(e) or type(e).__name__
+    return (result[0] if isinstance(result, tuple) else result), None
+
+
+def _evaluate_chunk(jobs: list) -> list:
+    return [evaluate(job) for job in jobs]
+
+
+def _init_worker():
+    lookup_table.open()
+
+
+def _chunks(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate_ordered(jobs, workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """evaluate() over jobs, in input order; with workers > 1 chunks run in a process pool.
+
+    At most 2 * workers chunks are submitted ahead of the one being yielded, so a slow
+    chunk holds back the output, not the memory.
+    """
+    if workers <= 1:
+        yield from map(evaluate, jobs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in _chunks(jobs, chunk_size):
+            pending.append(pool.submit(_evaluate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _result_line(operation: str, input_data: str, result: int) -> str:
+    # json.dumps would go through int.__repr__, which refuses ints above 4300 digits.
+    return f'{{"operation": {json.dumps(operation)}, "input": {json.dumps(input_data)}, "result": {int_to_str(result)}}}'
+
+
+def run_batch(lines, input_format: str, write, workers: int = 0,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, log_batch: int = DEFAULT_LOG_BATCH) -> dict:
+    """Evaluate every record in ``lines``, call write() with one JSON line per record and
+    log successes to the database ``log_batch`` rows per transaction; returns counts."""
+    counts = {"records": 0, "errors": 0, "logged": 0}
+    # (line number, operation, input, parse error) for the records read but not yet written;
+    # jobs() runs at most the pool's window ahead of the output loop.
+    parsed = deque()
+    rows = []
+
+    def jobs():
+        for line_no, record in read_records(lines, input_format):
+            try:
+                if isinstance(record, str):
+                    raise ValueError(record)
+                operation, func, args, input_data = parse_record(record)
+            except ValueError as e:
+                parsed.append((line_no, None, None, str(e)))
+                yield None
+                continue
+            parsed.append((line_no, operation, input_data, None))
+            yield operation, func, args
+
+    try:
+        for result, error in evaluate_ordered(jobs(), workers, chunk_size):
+            line_no, operation, input_data, parse_error = parsed.popleft()
+            counts["records"] += 1
+            error = parse_error or error
+            if error is not None:
+                counts["errors"] += 1
+                write(json.dumps({"line": line_no, "error": error}))
+                continue
+            write(_result_line(operation, input_data, result))
+            rows.append((operation, input_data, result, datetime.utcnow().isoformat()))
+            if len(rows) >= log_batch:
+                insert_logs(rows)
+                counts["logged"] += len(rows)
+                rows = []
+    finally:
+        # Even if the run dies (a crashed worker, a closed pipe), what was written out is logged.
+        if rows:
+            insert_logs(rows)
+            counts["logged"] += len(rows)
+    return counts
@@ -0,0 +1,259 @@
+"""Microbenchmarks for math_ops, an in-process load generator for the FastAPI app and
+cold-start timings for both entry points.
+
+All return plain dicts that can be saved as JSON and compared run against run.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+from app import math_ops
+
+MICRO_SIZES = {
+    "power": [(3, 10 ** k) for k in range(1, 7)],
+    "fibonacci": [(10 ** k,) for k in range(1, 7)],
+    "factorial": [(10 ** k,) for k in range(1, 6)],
+}
+MICRO_FUNCTIONS = {
+    "power": math_ops.power,
+    "fibonacci": math_ops.fibonacci,
+    "factorial": math_ops.factorial,
+}
+DISTRIBUTIONS = ("uniform", "zipf", "fixed")
+# Fresh interpreters timed by run_startup, as arguments to sys.executable.
+STARTUP_COMMANDS = {
+    "cli_import": ["-c", "import app.cli"],
+    "cli_help": ["-m", "app.cli", "--help"],
+    "cli_fib": ["-m", "app.cli", "fib", "30"],
+    "api_import": ["-c", "import app.main"],
+}
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_bytes(children: bool = False):
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(sorted_values: list, fraction: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "min": ordered[0],
+        "p50": percentile(ordered, 0.50),
+        "p90": percentile(ordered, 0.90),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1],
+    }
+
+
+def _environment() -> dict:
+    import platform
+
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "time": time.time()}
+
+
+def run_micro(operations=tuple(MICRO_FUNCTIONS), repeat: int = 5, budget: float = 2.0) -> dict:
+    """Time each math_ops function over MICRO_SIZES; a size is skipped once one call exceeds budget."""
+    results = {}
+    for operation in operations:
+        func = MICRO_FUNCTIONS[operation]
+        for args in MICRO_SIZES[operation]:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(*args)
+                timings.append(time.perf_counter() - start)
+                if timings[-1] > budget:
+                    break
+            results[f"{operation}{list(args)}"] = _summary(timings)
+            if timings[-1] > budget:
+                break
+    return {"kind": "micro", "environment": _environment(), "results": results,
+            "peak_rss_bytes": peak_rss_bytes()}
+
+
+def _draw(distribution: str, low: int, high: int, rng: random.Random) -> int:
+    if distribution == "fixed":
+        return high
+    if distribution == "zipf":
+        # Heavy head: a few inputs take most of the traffic, like a dashboard refreshing.
+        rank = min(int(rng.paretovariate(1.2)), high - low + 1)
+        return low + rank - 1
+    return rng.randint(low, high)
+
+
+def _request_body(operation: str, n: int) -> dict:
+    return {"x": 3, "y": n} if operation == "power" else {"n": n}
+
+
+class _ASGIClient:
+    """Just enough of an HTTP client to POST JSON to an ASGI app in the same process."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def post(self, path: str, body: dict) -> int:
+        import asyncio
+
+        payload = json.dumps(body).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"content-type", b"application/json"),
+                                         (b"content-length", str(len(payload)).encode())],
+            "client": ("bench", 0), "server": ("bench", 80),
+        }
+        sent = False
+        status = [0]
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+
+        await self.app(scope, receive, send)
+        return status[0]
+
+    async def lifespan(self, event: str, queue, done):
+        await queue.put({"type": f"lifespan.{event}"})
+        message = await done.get()
+        if message["type"].endswith("failed"):
+            raise RuntimeError(message.get("message", f"lifespan {event} failed"))
+
+
+async def _load(app, operations, distribution, low, high, requests, concurrency, seed) -> dict:
+    import asyncio
+
+    client = _ASGIClient(app)
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    lifespan = asyncio.ensure_future(app({"type": "lifespan", "asgi": {"version": "3.0"}},
+                                         inbox.get, outbox.put))
+    await client.lifespan("startup", inbox, outbox)
+    rng = random.Random(seed)
+    plan = [(rng.choice(operations), _draw(distribution, low, high, rng)) for _ in range(requests)]
+    latencies, statuses = [], {}
+
+    async def worker(jobs):
+        for operation, n in jobs:
+            start = time.perf_counter()
+            status = await client.post(f"/{operation}", _request_body(operation, n))
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(plan[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await client.lifespan("shutdown", inbox, outbox)
+    await lifespan
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+
+def run_load(operations=("fibonacci", "factorial"), distribution: str = "zipf", low: int = 1,
+             high: int = 5000, requests: int = 2000, concurrency: int = 16, seed: int = 0) -> dict:
+    """Drive app.main.app through ASGI with ``concurrency`` concurrent clients."""
+    import asyncio
+    from app.main import app
+
+    run = asyncio.run(_load(app, list(operations), distribution, low, high, requests, concurrency, seed))
+    return {
+        "kind": "load",
+        "environment": _environment(),
+        "config": {"operations": list(operations), "distribution": distribution, "low": low,
+                   "high": high, "requests": requests, "concurrency": concurrency, "seed": seed},
+        "results": {
+            "throughput_rps": requests / run["elapsed"],
+            "latency_seconds": _summary(run["latencies"]),
+            "statuses": {str(status): count for status, count in run["statuses"].items()},
+        },
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def _run_python(args: list, cwd: str):
+    import subprocess
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def run_startup(commands=tuple(STARTUP_COMMANDS), repeat: int = 10) -> dict:
+    """Wall time of fresh interpreters running each of STARTUP_COMMANDS, in a scratch directory."""
+    import tempfile
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in commands:
+            _run_python(STARTUP_COMMANDS[name], scratch)  # warm the bytecode and page caches
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _run_python(STARTUP_COMMANDS[name], scratch)
+                timings.append(time.perf_counter() - start)
+            results[name] = _summary(timings)
+    return {"kind": "startup", "environment": _environment(), "config": {"repeat": repeat},
+            "results": results, "peak_rss_bytes": peak_rss_bytes(children=True)}
+
+
+def import_times(module: str) -> list:
+    """Per-module import times of ``import module`` in a fresh interpreter (python -X importtime).
+
+    Rows are dicts with self and cumulative microseconds and the nesting depth, in import order.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as scratch:
+        output = _run_python(["-X", "importtime", "-c", f"import {module}"], scratch).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                     "depth": depth})
+    return rows
+
+
+def _flatten(prefix: str, value, out: dict):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """Metrics that got worse by more than ``threshold``; higher is better only for throughput."""
+    old = _flatten("", {"results": baseline["results"], "peak_rss_bytes": baseline.get("peak_rss_bytes")}, {})
+    new = _flatten("", {"results": current["results"], "peak_rss_bytes": current.get("peak_rss_bytes")}, {})
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        if ".statuses." in key or not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        if "throughput" in key:
+            change = -change
+        if change > threshold:
+            regressions.append({"metric": key, "baseline": old[key], "current": new[key],
+                                "change": round(change, 4)})
+    return regressions
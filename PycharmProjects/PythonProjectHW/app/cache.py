@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MATH_CACHE_MAX_ENTRIES", 1024))
+DEFAULT_MAX_BYTES = int(os.environ.get("MATH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DEFAULT_POLICY = os.environ.get("MATH_CACHE_POLICY", "lru")
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+class ResultCache:
+    """Thread-safe memo of (operation, args) -> result, bounded by entry count and bytes."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, policy: str = DEFAULT_POLICY):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(max_entries, max_bytes, policy)
+
+    def configure(self, max_entries: int, max_bytes: int, policy: str) -> None:
+        """Change the limits and policy; existing entries are dropped."""
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self.policy = policy
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}  # key -> (value, size, frequency)
+            self._order = OrderedDict()  # LRU order, oldest first
+            self._buckets = defaultdict(OrderedDict)  # LFU: frequency -> keys, oldest first
+            self._min_freq = 0
+            self.current_bytes = 0
+
+    def get(self, operation: str, args: tuple):
+        key = (operation, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, entry)
+            return entry[0]
+
+    def put(self, operation: str, args: tuple, value) -> None:
+        key = (operation, args)
+        size = sys.getsizeof(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and (len(self._entries) >= self.max_entries
+                                     or self.current_bytes + size > self.max_bytes):
+                self._evict()
+            self._entries[key] = (value, size, 1)
+            self.current_bytes += size
+            if self.policy == "lru":
+                self._order[key] = None
+            else:
+                self._buckets[1][key] = None
+                self._min_freq = 1
+
+    def get_or_compute(self, operation: str, args: tuple, func):
+        value = self.get(operation, args)
+        if value is None:
+            value = func(*args)
+            self.put(operation, args, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _touch(self, key, entry) -> None:
+        if self.policy == "lru":
+            self._order.move_to_end(key)
+            return
+        value, size, freq = entry
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._buckets[freq + 1][key] = None
+        self._entries[key] = (value, size, freq + 1)
+
+    def _remove(self, key) -> None:
+        _, size, freq = self._entries.pop(key)
+        self.current_bytes -= size
+        if self.policy == "lru":
+            del self._order[key]
+            return
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._buckets and self._min_freq == freq:
+                self._min_freq = min(self._buckets)
+
+    def _evict(self) -> None:
+        if self.policy == "lru":
+            key = next(iter(self._order))
+        else:
+            key = next(iter(self._buckets[self._min_freq]))
+        self._remove(key)
+        self.evictions += 1
+
+
+result_cache = ResultCache()
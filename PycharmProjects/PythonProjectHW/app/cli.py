@@ -1,34 +1,278 @@
+import json
+import sys
 import click
-from models import OperationRequest
-from math_ops import power, fibonacci, factorial
-from db import log_operation
+from app.math_ops import (power, power_variant, fibonacci, factorial, fibonacci_mod, factorial_mod,
+                          FIBONACCI_ENGINES, FACTORIAL_ENGINES)
+from app.db import init_db, log_operation, migrate_results, vacuum, query_logs, aggregate_logs, to_epoch_ms, BUCKET_MS
+from app.cache import result_cache, EVICTION_POLICIES, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES, DEFAULT_POLICY
+from app.lookup import lookup_table, write_table, LOOKUP_TABLE_PATH, DEFAULT_MAX_N
+from app.cost import check_budget, cost_limiter, BudgetError
+from app.single_flight import single_flight
+from app.result_codec import RESULT_FORMATS
+from app.retention import run_retention, RETENTION_DAYS, ARCHIVE_DIR, VACUUM_PAGES
+from app import bench as benchmarks
+from app.batch import run_batch, INPUT_FORMATS, DEFAULT_CHUNK_SIZE, DEFAULT_LOG_BATCH
+from app.streaming import int_to_str
+
+def compute(operation, func, args):
+    try:
+        cost_bits = check_budget(operation, args)
+        result = lookup_table.get(operation, args[0])
+        if result is not None:
+            return result
+        with cost_limiter.reserve(cost_bits):
+            return single_flight.do(operation, args, lambda: result_cache.get_or_compute(operation, args, func))
+    except BudgetError as e:
+        details = ", ".join(f"{key}={value}" for key, value in e.details.items())
+        raise click.ClickException(f"{e} ({details})")
 
 @click.group()
-def cli():
+@click.option("--cache-entries", type=int, default=DEFAULT_MAX_ENTRIES, help="Result cache entry cap")
+@click.option("--cache-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Result cache size cap in bytes")
+@click.option("--cache-policy", type=click.Choice(EVICTION_POLICIES), default=DEFAULT_POLICY,
+              help="Result cache eviction policy")
+def cli(cache_entries, cache_bytes, cache_policy):
     """Math CLI tool"""
-    pass
+    init_db()
+    result_cache.configure(cache_entries, cache_bytes, cache_policy)
+    lookup_table.open()
 
 @cli.command()
 @click.argument("x", type=int)
 @click.argument("y", type=int)
-def pow(x, y):
+@click.option("--mod", "modulus", type=click.IntRange(min=1), help="Only x**y modulo this")
+@click.option("--leading", type=click.IntRange(min=1), help="Only the first K digits")
+@click.option("--last", type=click.IntRange(min=1), help="Only the last K digits")
+@click.option("--bits", is_flag=True, help="Only the bit length")
+def pow(x, y, modulus, leading, last, bits):
     """Calculate x to the power of y"""
-    result = power(x, y)
-    log_operation("pow", f"{x},{y}", str(result))
-    click.echo(f"Result: {result}")
+    modes = [mode for mode, chosen in (("mod", modulus), ("leading", leading), ("last", last), ("bits", bits))
+             if chosen]
+    if len(modes) > 1:
+        raise click.UsageError("--mod, --leading, --last and --bits are mutually exclusive")
+    if not modes:
+        result = compute("power", power, (x, y))
+        log_operation("pow", f"{x},{y}", result)
+        click.echo(f"Result: {int_to_str(result)}")
+        return
+    mode, value = modes[0], modulus or leading or last
+    try:
+        result, log10 = compute("power", power_variant, (x, y, mode, modulus, leading or last))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    log_operation("pow", f"{x},{y},{mode}" + (f"={value}" if value else ""), result)
+    click.echo(f"Result: {int_to_str(result)}")
+    if log10 is not None:
+        click.echo(f"log10: {log10!r}")
 
 @cli.command()
 @click.argument("n", type=int)
-def fib(n):
+@click.option("--engine", type=click.Choice(list(FIBONACCI_ENGINES)), default="doubling",
+              help="Fibonacci engine to use")
+def fib(n, engine):
     """Calculate n-th Fibonacci number"""
-    result = fibonacci(n)
-    log_operation("fib", str(n), str(result))
-    click.echo(f"Result: {result}")
+    result = compute("fibonacci", fibonacci, (n, engine))
+    log_operation("fib", str(n), result)
+    click.echo(f"Result: {int_to_str(result)}")
 
 @cli.command()
 @click.argument("n", type=int)
-def fact(n):
+@click.option("--engine", type=click.Choice(list(FACTORIAL_ENGINES)), default="split",
+              help="Factorial engine to use")
+def fact(n, engine):
     """Calculate factorial of n"""
-    result = factorial(n)
-    log_operation("fact", str(n), str(result))
+    result = compute("factorial", factorial, (n, engine))
+    log_operation("fact", str(n), result)
+    click.echo(f"Result: {int_to_str(result)}")
+
+@cli.command("fib-mod")
+@click.argument("n", type=click.IntRange(min=0))
+@click.argument("m", type=click.IntRange(min=1))
+def fib_mod(n, m):
+    """Calculate the n-th Fibonacci number modulo m"""
+    result = compute("fibonacci_mod", fibonacci_mod, (n, m))
+    log_operation("fib_mod", f"{n},{m}", result)
+    click.echo(f"Result: {result}")
+
+@cli.command("fact-mod")
+@click.argument("n", type=click.IntRange(min=0))
+@click.argument("m", type=click.IntRange(min=1))
+def fact_mod(n, m):
+    """Calculate factorial of n modulo m"""
+    try:
+        result = compute("factorial_mod", factorial_mod, (n, m))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    log_operation("fact_mod", f"{n},{m}", result)
     click.echo(f"Result: {result}")
+
+@cli.command("build-lookup")
+@click.option("--output", default=LOOKUP_TABLE_PATH, help="Table file to write")
+@click.option("--fib-max", type=click.IntRange(min=-1), default=DEFAULT_MAX_N,
+              help="Largest n to precompute fibonacci for (-1 for none)")
+@click.option("--fact-max", type=click.IntRange(min=-1), default=DEFAULT_MAX_N,
+              help="Largest n to precompute factorial for (-1 for none)")
+def build_lookup(output, fib_max, fact_max):
+    """Precompute small fibonacci/factorial values into a memory-mapped lookup table"""
+    click.echo(json.dumps(write_table(output, {"fibonacci": fib_max + 1, "factorial": fact_max + 1})))
+
+@cli.command()
+@click.argument("input_file", type=click.File("r"), default="-")
+@click.option("--format", "input_format", type=click.Choice(INPUT_FORMATS),
+              help="Input format (default: csv for *.csv files, otherwise jsonl)")
+@click.option("--workers", type=click.IntRange(min=0), default=0,
+              help="Worker processes to fan out to (0 or 1: compute in this process)")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+              help="Records handed to a worker at a time")
+@click.option("--log-batch", type=click.IntRange(min=1), default=DEFAULT_LOG_BATCH,
+              help="Log rows committed per transaction")
+def batch(input_file, input_format, workers, chunk_size, log_batch):
+    """Evaluate one operation per record from INPUT_FILE (or stdin) and print one JSON line each
+
+    \b
+    JSONL: {"operation": "fibonacci", "n": 100}
+    CSV:   operation,n,x,y,modulus,mode,digits header, unused cells left empty
+    Operations: power (x, y, optional mode/modulus/digits), fibonacci, factorial (n),
+    fibonacci_mod, factorial_mod (n, modulus). Output is in input order.
+    """
+    if input_format is None:
+        input_format = "csv" if input_file.name.endswith(".csv") else "jsonl"
+    counts = run_batch(input_file, input_format, lambda line: sys.stdout.write(line + "\n"),
+                       workers, chunk_size, log_batch)
+    click.echo(json.dumps(counts), err=True)
+
+@cli.command("migrate-results")
+@click.option("--format", "result_format", type=click.Choice(RESULT_FORMATS), required=True,
+              help="Storage format to convert logged results to")
+@click.option("--batch-size", type=int, default=1000, help="Rows rewritten per transaction")
+@click.option("--vacuum/--no-vacuum", "run_vacuum", default=True, help="Reclaim freed space afterwards")
+def migrate_results_command(result_format, batch_size, run_vacuum):
+    """Re-encode logged results into another storage format"""
+    rewritten = migrate_results(result_format, batch_size)
+    if run_vacuum:
+        vacuum()
+    click.echo(f"Rewrote {rewritten} rows as {result_format}")
+
+@cli.group()
+def logs():
+    """Query the operations log"""
+    pass
+
+def epoch_range(since, until):
+    return (to_epoch_ms(since) if since else None, to_epoch_ms(until) if until else None)
+
+@logs.command("list")
+@click.option("--operation", help="Only this operation")
+@click.option("--since", type=click.DateTime(), help="Start of the time range (UTC)")
+@click.option("--until", type=click.DateTime(), help="End of the time range (UTC, exclusive)")
+@click.option("--cursor", help="next_cursor from the previous page")
+@click.option("--limit", type=click.IntRange(1, 10000), default=100, help="Rows per page")
+def logs_list(operation, since, until, cursor, limit):
+    """List log rows, newest first, one JSON object per line"""
+    page = query_logs(operation, *epoch_range(since, until), cursor=cursor, limit=limit)
+    for item in page["items"]:
+        click.echo(json.dumps(item))
+    if page["next_cursor"]:
+        click.echo(f"Next cursor: {page['next_cursor']}", err=True)
+
+@logs.command("stats")
+@click.option("--operation", help="Only this operation")
+@click.option("--since", type=click.DateTime(), help="Start of the time range (UTC)")
+@click.option("--until", type=click.DateTime(), help="End of the time range (UTC, exclusive)")
+@click.option("--bucket", type=click.Choice(list(BUCKET_MS)), default="minute", help="Aggregation bucket")
+def logs_stats(operation, since, until, bucket):
+    """Counts and p50/p95 input size per operation per time bucket"""
+    for row in aggregate_logs(operation, *epoch_range(since, until), bucket=bucket):
+        click.echo(json.dumps(row))
+
+@cli.command()
+@click.option("--days", type=float, default=RETENTION_DAYS, help="Keep this many days of raw rows")
+@click.option("--archive-dir", default=ARCHIVE_DIR, help="Where per-day archive databases go")
+@click.option("--vacuum-pages", type=int, default=VACUUM_PAGES, help="Free pages to release per run")
+def retention(days, archive_dir, vacuum_pages):
+    """Roll up, archive and vacuum the operations log
+
+    The first run on a database created without incremental auto_vacuum converts it with a
+    full VACUUM, which blocks writers while it runs; the API's scheduler never does that.
+    """
+    click.echo(json.dumps(run_retention(days, archive_dir, vacuum_pages, convert_vacuum=True)))
+
+@cli.group()
+def bench():
+    """Benchmark the math functions and the HTTP API"""
+    pass
+
+def emit_report(report, output):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    click.echo(text)
+
+@bench.command("micro")
+@click.option("--operation", "operations", multiple=True, type=click.Choice(list(benchmarks.MICRO_FUNCTIONS)),
+              help="Operations to time (default: all)")
+@click.option("--repeat", type=int, default=5, help="Calls per input size")
+@click.option("--budget", type=float, default=2.0, help="Stop growing n once a call takes this many seconds")
+@click.option("--output", type=click.Path(dir_okay=False), help="Also save the report as JSON here")
+def bench_micro(operations, repeat, budget, output):
+    """Time each math_ops function across input sizes"""
+    report = benchmarks.run_micro(operations or tuple(benchmarks.MICRO_FUNCTIONS), repeat, budget)
+    emit_report(report, output)
+
+@bench.command("load")
+@click.option("--operation", "operations", multiple=True, type=click.Choice(list(benchmarks.MICRO_FUNCTIONS)),
+              help="Endpoints to hit (default: fibonacci and factorial)")
+@click.option("--distribution", type=click.Choice(benchmarks.DISTRIBUTIONS), default="zipf",
+              help="How input sizes are drawn")
+@click.option("--low", type=int, default=1, help="Smallest input")
+@click.option("--high", type=int, default=5000, help="Largest input")
+@click.option("--requests", type=int, default=2000, help="Total requests")
+@click.option("--concurrency", type=int, default=16, help="Concurrent clients")
+@click.option("--seed", type=int, default=0, help="Random seed for the request plan")
+@click.option("--output", type=click.Path(dir_okay=False), help="Also save the report as JSON here")
+def bench_load(operations, distribution, low, high, requests, concurrency, seed, output):
+    """Drive the FastAPI app in-process and report throughput, latency and peak RSS"""
+    report = benchmarks.run_load(operations or ("fibonacci", "factorial"), distribution, low, high,
+                                 requests, concurrency, seed)
+    emit_report(report, output)
+
+@bench.command("startup")
+@click.option("--command", "commands", multiple=True, type=click.Choice(list(benchmarks.STARTUP_COMMANDS)),
+              help="Entry points to time (default: all)")
+@click.option("--repeat", type=int, default=10, help="Fresh interpreters per entry point")
+@click.option("--output", type=click.Path(dir_okay=False), help="Also save the report as JSON here")
+def bench_startup(commands, repeat, output):
+    """Time cold starts of the CLI and the API module in fresh interpreters"""
+    report = benchmarks.run_startup(commands or tuple(benchmarks.STARTUP_COMMANDS), repeat)
+    emit_report(report, output)
+
+@bench.command("compare")
+@click.argument("baseline", type=click.File())
+@click.argument("current", type=click.File())
+@click.option("--threshold", type=float, default=0.10, help="Relative change that counts as a regression")
+def bench_compare(baseline, current, threshold):
+    """Compare two saved reports; exits non-zero on regressions"""
+    regressions = benchmarks.compare(json.load(baseline), json.load(current), threshold)
+    for regression in regressions:
+        click.echo(json.dumps(regression))
+    if regressions:
+        raise click.ClickException(f"{len(regressions)} metric(s) regressed by more than {threshold:.0%}")
+    click.echo("No regressions")
+
+@cli.command("importtime")
+@click.argument("module", default="app.cli")
+@click.option("--top", type=int, default=20, help="How many modules to list, slowest first")
+@click.option("--sort", "sort_key", type=click.Choice(["self", "cumulative"]), default="self",
+              help="Rank modules by their own import time or including what they import")
+def importtime(module, top, sort_key):
+    """Show which imports make MODULE slow to load (python -X importtime)"""
+    rows = benchmarks.import_times(module)
+    total = sum(row["cumulative_us"] for row in rows if row["depth"] == 0)
+    click.echo(f"{len(rows)} modules, {total / 1000:.1f} ms total")
+    click.echo(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for row in sorted(rows, key=lambda row: row[f"{sort_key}_us"], reverse=True)[:top]:
+        click.echo(f"{row['self_us'] / 1000:9.1f} {row['cumulative_us'] / 1000:9.1f}  {'  ' * row['depth']}{row['module']}")
+
+if __name__ == "__main__":
+    cli()
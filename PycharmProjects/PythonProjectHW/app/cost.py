@@ -0,0 +1,240 @@
+import math
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+LOG2_PHI = math.log2((1 + math.sqrt(5)) / 2)
+# Big-int multiplication in CPython is Karatsuba, so time grows like bits ** log2(3).
+KARATSUBA_EXPONENT = math.log2(3)
+# Seconds per bits ** KARATSUBA_EXPONENT, fitted on fibonacci(10^6) and factorial(10^5..10^6).
+CPU_SECONDS_PER_UNIT = {"power": 1.5e-11, "fibonacci": 3e-11, "factorial": 3e-11}
+# factorial_mod multiplies about min(n, m - n) small factors, at roughly this cost each.
+MODULAR_SECONDS_PER_STEP = 6e-8
+# pow(x, y, m) does up to 2 * y.bit_length() multiplications, each reduced by schoolbook
+# division, so it costs about this times y.bit_length() * m.bit_length() ** 2.
+POWER_MOD_SECONDS_PER_UNIT = 2.2e-12
+# The leading and bits modes take a Decimal ln at a precision of about digits + len(str(y));
+# seconds per precision ** 2, fitted on 1000-15000 digits (an upper bound, libmpdec is bumpy).
+DECIMAL_LN_SECONDS_PER_UNIT = 2.6e-7
+
+OPERATIONS = ("power", "fibonacci", "factorial", "fibonacci_mod", "factorial_mod")
+DEFAULT_MAX_RESULT_BITS = int(os.environ.get("MATH_MAX_RESULT_BITS", 1 << 26))
+DEFAULT_MAX_CPU_SECONDS = float(os.environ.get("MATH_MAX_CPU_SECONDS", 10))
+MAX_INFLIGHT_BITS = float(os.environ.get("MATH_MAX_INFLIGHT_BITS", 1 << 28))
+ADMISSION_TIMEOUT = float(os.environ.get("MATH_ADMISSION_TIMEOUT", 5))
+MAX_BATCH_ITEMS = int(os.environ.get("MATH_MAX_BATCH_ITEMS", 1000))
+
+
+class BudgetError(Exception):
+    """A request was refused by the cost guard; carries an HTTP status and a JSON body."""
+
+    status_code = 400
+    error = "budget_error"
+
+    def __init__(self, message: str, **details):
+        super().__init__(message)
+        self.details = details
+
+    def to_dict(self) -> dict:
+        return {"error": self.error, "detail": str(self), **self.details}
+
+
+class CostLimitExceeded(BudgetError):
+    status_code = 413
+    error = "cost_limit_exceeded"
+
+
+class AdmissionRejected(BudgetError):
+    status_code = 429
+    error = "too_many_inflight"
+
+
+def estimate_result_bits(operation: str, args: tuple) -> float:
+    """Rough bit length of the result of ``operation(*args)``, without computing it."""
+    try:
+        if operation == "power":
+            x, y = args[:2]
+            if len(args) > 2 and args[2] != "exact":
+                return _power_variant_bits(y, *args[2:])
+            if y <= 0 or abs(x) <= 1:
+                return 1.0
+            return y * math.log2(abs(x))
+        if operation == "fibonacci":
+            return max(1.0, args[0] * LOG2_PHI)
+        if operation == "factorial":
+            n = args[0]
+            return max(1.0, math.lgamma(n + 1) / math.log(2)) if n > 1 else 1.0
+        if operation in ("fibonacci_mod", "factorial_mod"):
+            return float(max(1, args[1].bit_length()))
+    except OverflowError:
+        return math.inf
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def _power_variant_bits(y: int, mode: str, modulus: int = None, digits: int = None) -> float:
+    # The non-exact power modes never build x**y; their results are bounded by their own arguments.
+    if mode == "mod":
+        return float(max(1, (modulus or 1).bit_length()))
+    if mode == "bits":
+        return float(max(1, y.bit_length()))
+    return max(1.0, (digits or 1) * math.log2(10))
+
+
+def _power_variant_seconds(x: int, y: int, mode: str, modulus: int = None, digits: int = None) -> float:
+    # Unlike exact powers, these modes cost far more than their small results suggest.
+    if mode in ("mod", "last"):
+        modulus_bits = (modulus or 1).bit_length() if mode == "mod" else (digits or 1) * math.log2(10)
+        return POWER_MOD_SECONDS_PER_UNIT * max(1, abs(y).bit_length()) * modulus_bits ** 2
+    precision = abs(y).bit_length() * math.log10(2) + 20
+    if mode == "leading":
+        precision += digits or 1
+    return DECIMAL_LN_SECONDS_PER_UNIT * precision ** 2
+
+
+def estimate_cpu_seconds(operation: str, args: tuple) -> float:
+    if operation == "power" and len(args) > 2 and args[2] != "exact":
+        return _power_variant_seconds(*args)
+    if operation == "factorial_mod":
+        n, modulus = args
+        return MODULAR_SECONDS_PER_STEP * min(n, modulus - n) if n < modulus else 0.0
+    if operation == "fibonacci_mod":
+        n, modulus = args
+        return CPU_SECONDS_PER_UNIT["fibonacci"] * max(1, modulus.bit_length()) ** KARATSUBA_EXPONENT * n.bit_length()
+    return CPU_SECONDS_PER_UNIT[operation] * estimate_result_bits(operation, args) ** KARATSUBA_EXPONENT
+
+
+def _limit(name: str, operation: str, default):
+    return type(default)(os.environ.get(f"MATH_{name}_{operation.upper()}", default))
+
+
+OPERATION_LIMITS = {
+    operation: {
+        "max_result_bits": _limit("MAX_RESULT_BITS", operation, DEFAULT_MAX_RESULT_BITS),
+        "max_cpu_seconds": _limit("MAX_CPU_SECONDS", operation, DEFAULT_MAX_CPU_SECONDS),
+    }
+    for operation in OPERATIONS
+}
+
+
+def _enforce_limits(operation: str, bits: float, seconds: float, what: str):
+    limits = OPERATION_LIMITS[operation]
+    if bits > limits["max_result_bits"] or seconds > limits["max_cpu_seconds"]:
+        raise CostLimitExceeded(
+            f"Estimated cost of {what} exceeds its limit",
+            operation=operation,
+            estimated_bits=round(bits) if math.isfinite(bits) else None,
+            estimated_cpu_seconds=round(seconds, 3) if math.isfinite(seconds) else None,
+            **limits,
+        )
+
+
+def check_budget(operation: str, args: tuple) -> float:
+    """Raise CostLimitExceeded if the call is over its operation's limits; return its bit estimate."""
+    bits = estimate_result_bits(operation, args)
+    _enforce_limits(operation, bits, estimate_cpu_seconds(operation, args), operation)
+    return bits
+
+
+def check_batch_budget(operation: str, items: list) -> tuple:
+    """check_budget() for a batch computed as one call: the item count is capped and the
+    summed estimates must fit the operation's limits too. Returns (bits, cpu seconds)."""
+    if len(items) > MAX_BATCH_ITEMS:
+        raise CostLimitExceeded(
+            f"Batch of {len(items)} {operation} items exceeds the limit of {MAX_BATCH_ITEMS}",
+            operation=operation,
+            items=len(items),
+            max_batch_items=MAX_BATCH_ITEMS,
+        )
+    bits = seconds = 0.0
+    for args in items:
+        bits += check_budget(operation, args)
+        seconds += estimate_cpu_seconds(operation, args)
+    _enforce_limits(operation, bits, seconds, f"the {operation} batch")
+    return bits, seconds
+
+
+class CostLimiter:
+    """Caps the total estimated result bits being computed at once in this process.
+
+    A call that does not fit waits up to ``timeout`` seconds for capacity and is then
+    rejected; a single call larger than the cap is admitted only when nothing else runs.
+    """
+
+    def __init__(self, max_inflight_bits: float = MAX_INFLIGHT_BITS, timeout: float = ADMISSION_TIMEOUT):
+        self.max_inflight_bits = max_inflight_bits
+        self.timeout = timeout
+        self.inflight_bits = 0.0
+        self.inflight_calls = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+        self._waiters = []
+
+    def _try_acquire(self, cost: float) -> bool:
+        if self.inflight_calls and self.inflight_bits + cost > self.max_inflight_bits:
+            return False
+        self.inflight_bits += cost
+        self.inflight_calls += 1
+        return True
+
+    def _reject(self, cost: float):
+        self.rejected += 1
+        raise AdmissionRejected(
+            "Too much work in flight, retry later",
+            requested_bits=round(cost),
+            inflight_bits=round(self.inflight_bits),
+            max_inflight_bits=round(self.max_inflight_bits),
+        )
+
+    def release(self, cost: float):
+        with self._cond:
+            self.inflight_bits -= cost
+            self.inflight_calls -= 1
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+    @contextmanager
+    def reserve(self, cost: float):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._try_acquire(cost), self.timeout):
+                self._reject(cost)
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    @asynccontextmanager
+    async def reserve_async(self, cost: float):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            with self._cond:
+                if self._try_acquire(cost):
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._reject(cost)
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    def stats(self) -> dict:
+        return {
+            "inflight_bits": round(self.inflight_bits),
+            "inflight_calls": self.inflight_calls,
+            "max_inflight_bits": round(self.max_inflight_bits),
+            "rejected": self.rejected,
+        }
+
+
+cost_limiter = CostLimiter()
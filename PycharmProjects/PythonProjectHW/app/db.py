@@ -1,29 +1,240 @@
+import os
+import re
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.result_codec import RESULT_FORMATS, encode_result, decode_result
+from app.metrics import DB_COMMIT_SECONDS, DB_ROWS_WRITTEN
 
 DB_NAME = "operations.db"
+# Durability vs. throughput knobs; WAL + NORMAL only fsyncs at checkpoints.
+JOURNAL_MODE = os.environ.get("MATH_DB_JOURNAL_MODE", "WAL")
+SYNCHRONOUS = os.environ.get("MATH_DB_SYNCHRONOUS", "NORMAL")
+BUSY_TIMEOUT_MS = int(os.environ.get("MATH_DB_BUSY_TIMEOUT_MS", 5000))
+# How logs.result is stored: text, blob, zlib, lzma or digest (see result_codec).
+RESULT_FORMAT = os.environ.get("MATH_RESULT_FORMAT", "text")
+
+_local = threading.local()
+
+def connect(db_name: str = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_name or DB_NAME, check_same_thread=False)
+    # Lets retention hand free pages back with PRAGMA incremental_vacuum. It only takes
+    # effect on a new database, before anything (even the switch to WAL) writes to it;
+    # existing databases are converted once by `cli retention`.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's connection to DB_NAME, opening it on first use (or after a fork)."""
+    key = (os.getpid(), DB_NAME)
+    current = getattr(_local, "key", None)
+    if current != key:
+        if current is not None and current[0] == key[0]:
+            _local.conn.close()
+        _local.conn = connect()
+        _local.key = key
+    return _local.conn
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+        _local.key = None
 
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            operation TEXT,
-            input TEXT,
-            result TEXT,
-            timestamp TEXT
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation TEXT,
+                input TEXT,
+                result TEXT,
+                timestamp TEXT,
+                result_format TEXT,
+                epoch_ms INTEGER,
+                input_size INTEGER
+            )
+        ''')
+        _add_missing_columns(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_epoch ON logs (epoch_ms)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_operation_epoch ON logs (operation, epoch_ms)")
+    backfill_columns()
+
+# Columns added after the first release; older databases get them through ALTER TABLE.
+_LATER_COLUMNS = {
+    "result_format": "TEXT",
+    "epoch_ms": "INTEGER",
+    "input_size": "INTEGER",
+}
+
+_INTEGER = re.compile(r"-?\d+")
+_SQLITE_MAX_INT = 2 ** 63 - 1
+
+def input_size(input_data: str):
+    """Largest absolute integer argument in a logged input such as "n=10" or "x=2,y=64"."""
+    sizes = []
+    for match in _INTEGER.findall(input_data or ""):
+        digits = match.lstrip("-")
+        sizes.append(_SQLITE_MAX_INT if len(digits) > 18 else int(digits))
+    return max(sizes, default=None)
+
+def to_epoch_ms(moment: datetime) -> int:
+    """Epoch milliseconds for an aware datetime, or a naive one taken as UTC (like our timestamps)."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+def backfill_columns(batch_size: int = 10000) -> int:
+    """Fill epoch_ms and input_size on rows written before those columns existed."""
+    conn = get_connection()
+    filled = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, timestamp, input FROM logs WHERE epoch_ms IS NULL LIMIT ?", (batch_size,)).fetchall()
+        if not rows:
+            return filled
+        updates = []
+        for log_id, timestamp, input_data in rows:
+            try:
+                epoch_ms = to_epoch_ms(datetime.fromisoformat(timestamp))
+            except (TypeError, ValueError):
+                epoch_ms = 0
+            updates.append((epoch_ms, input_size(input_data), log_id))
+        with conn:
+            conn.executemany("UPDATE logs SET epoch_ms = ?, input_size = ? WHERE id = ?", updates)
+        filled += len(rows)
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    for column, column_type in _LATER_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE logs ADD COLUMN {column} {column_type}")
+
+def log_operation(operation: str, input_data: str, result):
+    insert_logs([(operation, input_data, result, datetime.utcnow().isoformat())])
+
+def log_operations(rows: list):
+    """Insert many (operation, input, result) rows in a single transaction."""
+    timestamp = datetime.utcnow().isoformat()
+    insert_logs([(operation, input_data, result, timestamp) for operation, input_data, result in rows])
+
+def insert_logs(rows: list, result_format: str = None):
+    """Insert already timestamped (operation, input, result, timestamp) rows in one transaction.
+
+    Results are raw values; they are encoded here, so the cost stays off the request path
+    when rows come through the log writer.
+    """
+    result_format = result_format or RESULT_FORMAT
+    encoded = []
+    for operation, input_data, result, timestamp in rows:
+        payload, used_format = encode_result(result, result_format)
+        epoch_ms = to_epoch_ms(datetime.fromisoformat(timestamp))
+        encoded.append((operation, input_data, payload, timestamp, used_format, epoch_ms, input_size(input_data)))
+    conn = get_connection()
+    start = time.perf_counter()
+    with conn:
+        conn.executemany('''
+            INSERT INTO logs (operation, input, result, timestamp, result_format, epoch_ms, input_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', encoded)
+    DB_COMMIT_SECONDS.observe(time.perf_counter() - start)
+    DB_ROWS_WRITTEN.inc(amount=len(encoded))
+
+def read_result(log_id: int):
+    """Decoded result of one log row (a dict for digest rows), or None if there is no such row."""
+    row = get_connection().execute(
+        "SELECT result, result_format FROM logs WHERE id = ?", (log_id,)).fetchone()
+    return None if row is None else decode_result(*row)
+
+def migrate_results(result_format: str, batch_size: int = 1000) -> int:
+    """Re-encode stored results into result_format, batch by batch; returns rows rewritten.
+
+    Digest rows cannot be expanded back and are left alone.
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format: {result_format}")
+    conn = get_connection()
+    last_id, rewritten = 0, 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, result, result_format FROM logs
+            WHERE id > ? AND COALESCE(result_format, 'text') NOT IN (?, 'digest')
+            ORDER BY id LIMIT ?
+        ''', (last_id, result_format, batch_size)).fetchall()
+        if not rows:
+            return rewritten
+        updates = []
+        for log_id, payload, stored_format in rows:
+            updates.append(encode_result(decode_result(payload, stored_format), result_format) + (log_id,))
+        with conn:
+            conn.executemany("UPDATE logs SET result = ?, result_format = ? WHERE id = ?", updates)
+        last_id = rows[-1][0]
+        rewritten += len(rows)
+
+LOG_COLUMNS = ("id", "operation", "input", "input_size", "timestamp", "epoch_ms", "result_format")
+BUCKET_MS = {"minute": 60 * 1000, "hour": 60 * 60 * 1000, "day": 24 * 60 * 60 * 1000}
+
+def _range_filter(operation: str, since_ms: int, until_ms: int):
+    clauses, params = [], []
+    if operation is not None:
+        clauses.append("operation = ?")
+        params.append(operation)
+    if since_ms is not None:
+        clauses.append("epoch_ms >= ?")
+        params.append(since_ms)
+    if until_ms is not None:
+        clauses.append("epoch_ms < ?")
+        params.append(until_ms)
+    return clauses, params
+
+def query_logs(operation: str = None, since_ms: int = None, until_ms: int = None,
+               cursor: str = None, limit: int = 100) -> dict:
+    """Newest-first page of log rows (without results) and the cursor for the next page.
+
+    Pagination is keyset on (epoch_ms, id), so every page is an index range scan no
+    matter how deep it is.
+    """
+    clauses, params = _range_filter(operation, since_ms, until_ms)
+    if cursor:
+        cursor_ms, cursor_id = (int(part) for part in cursor.split(":"))
+        clauses.append("(epoch_ms, id) < (?, ?)")
+        params += [cursor_ms, cursor_id]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = get_connection().execute(f'''
+        SELECT {", ".join(LOG_COLUMNS)} FROM logs {where}
+        ORDER BY epoch_ms DESC, id DESC LIMIT ?
+    ''', params + [limit]).fetchall()
+    items = [dict(zip(LOG_COLUMNS, row)) for row in rows]
+    next_cursor = f"{items[-1]['epoch_ms']}:{items[-1]['id']}" if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def aggregate_logs(operation: str = None, since_ms: int = None, until_ms: int = None,
+                   bucket: str = "minute") -> list:
+    """Per operation and time bucket: row count and nearest-rank p50/p95 of input_size."""
+    width = BUCKET_MS[bucket]
+    clauses, params = _range_filter(operation, since_ms, until_ms)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = get_connection().execute(f'''
+        WITH ranked AS (
+            SELECT operation, epoch_ms / {width} AS bucket, input_size,
+                   ROW_NUMBER() OVER (PARTITION BY operation, epoch_ms / {width} ORDER BY input_size) AS rank,
+                   COUNT(*) OVER (PARTITION BY operation, epoch_ms / {width}) AS total
+            FROM logs {where}
         )
-    ''')
-    conn.commit()
-    conn.close()
-
-def log_operation(operation: str, input_data: str, result: str):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute('''
-        INSERT INTO logs (operation, input, result, timestamp)
-        VALUES (?, ?, ?, ?)
-    ''', (operation, input_data, result, datetime.utcnow().isoformat()))
-    conn.commit()
-    conn.close()
+        SELECT operation, bucket * {width}, MAX(total),
+               MIN(CASE WHEN rank >= 0.50 * total THEN input_size END),
+               MIN(CASE WHEN rank >= 0.95 * total THEN input_size END)
+        FROM ranked GROUP BY operation, bucket ORDER BY bucket, operation
+    ''', params).fetchall()
+    keys = ("operation", "bucket_start_ms", "count", "p50_input_size", "p95_input_size")
+    return [dict(zip(keys, row)) for row in rows]
+
+def vacuum():
+    get_connection().execute("VACUUM")
@@ -0,0 +1,128 @@
+import asyncio
+import os
+
+EXECUTION_MODE = os.environ.get("MATH_EXECUTION_MODE", "auto")
+EXECUTION_MODES = ("inline", "auto", "pool")
+# Calls whose estimated result is smaller than this run on the event loop.
+INLINE_MAX_BITS = float(os.environ.get("MATH_INLINE_MAX_BITS", 1 << 16))
+# ... and whose estimated CPU time is below this (small results can still be slow to get).
+INLINE_MAX_CPU_SECONDS = float(os.environ.get("MATH_INLINE_MAX_CPU_SECONDS", 0.01))
+POOL_WORKERS = int(os.environ.get("MATH_POOL_WORKERS", os.cpu_count() or 1))
+REQUEST_TIMEOUT = float(os.environ.get("MATH_REQUEST_TIMEOUT", 30))
+
+
+class OperationTimeout(Exception):
+    pass
+
+
+class PoolUnavailable(Exception):
+    """The worker pool kept breaking under a call; retrying later may work."""
+
+
+class MathExecutor:
+    """Runs math_ops calls inline or in a process pool, depending on their estimated cost.
+
+    A call that exceeds its timeout (or whose request is cancelled) while running in the
+    pool takes the pool's worker processes down with it; the pool is rebuilt on next use,
+    and the other calls that were running in it are retried once on the new one.
+    """
+
+    def __init__(self, mode: str = EXECUTION_MODE, inline_max_bits: float = INLINE_MAX_BITS,
+                 workers: int = POOL_WORKERS, timeout: float = REQUEST_TIMEOUT,
+                 inline_max_cpu_seconds: float = INLINE_MAX_CPU_SECONDS):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        self.mode = mode
+        self.inline_max_bits = inline_max_bits
+        self.inline_max_cpu_seconds = inline_max_cpu_seconds
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+        self.inline_calls = 0
+        self.pool_calls = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.pool_retries = 0
+
+    def should_offload(self, cost_bits: float, cpu_seconds: float = 0.0) -> bool:
+        if self.mode == "inline":
+            return False
+        return (self.mode == "pool" or cost_bits >= self.inline_max_bits
+                or cpu_seconds >= self.inline_max_cpu_seconds)
+
+    async def run(self, func, args: tuple, cost_bits: float, timeout: float = None, cpu_seconds: float = 0.0):
+        if not self.should_offload(cost_bits, cpu_seconds):
+            self.inline_calls += 1
+            return func(*args)
+        from concurrent.futures.process import BrokenProcessPool  # pulls in multiprocessing
+
+        self.pool_calls += 1
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        for attempt in range(2):
+            if attempt:
+                self.pool_retries += 1
+            pool = self._get_pool()
+            try:
+                future = pool.submit(func, *args)
+                return await asyncio.wait_for(asyncio.wrap_future(future), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._abort(future, pool)
+                raise OperationTimeout(f"Computation exceeded {timeout:g}s") from None
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    # Not this request going away: the pool dropped the queued call.
+                    self._reset_pool(pool)
+                    continue
+                self._abort(future, pool)
+                raise
+            except BrokenProcessPool:
+                # Usually another call's timeout killed the workers; this call did nothing wrong.
+                self._reset_pool(pool)
+        raise PoolUnavailable("The worker pool crashed twice while running this computation")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "inline_calls": self.inline_calls,
+            "pool_calls": self.pool_calls,
+            "timeouts": self.timeouts,
+            "pool_restarts": self.pool_restarts,
+            "pool_retries": self.pool_retries,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _abort(self, future, pool):
+        # A queued call can simply be cancelled; a running one can only be stopped by
+        # killing the workers, since ProcessPoolExecutor has no per-task termination.
+        if not future.cancel() and not future.done():
+            self._reset_pool(pool)
+
+    def _reset_pool(self, pool):
+        # Only the pool the call ran in: a later request may already have built its replacement.
+        if pool is None or pool is not self._pool:
+            return
+        self._pool = None
+        self.pool_restarts += 1
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.terminate()
+        # No cancel_futures: calls still queued for other requests should fail with
+        # BrokenProcessPool, which run() retries, not come back cancelled.
+        pool.shutdown(wait=False)
+
+
+math_executor = MathExecutor()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.db import insert_logs
+
+QUEUE_SIZE = int(os.environ.get("MATH_LOG_QUEUE_SIZE", 10000))
+BATCH_SIZE = int(os.environ.get("MATH_LOG_BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.environ.get("MATH_LOG_FLUSH_INTERVAL", 0.05))
+OVERFLOW_POLICY = os.environ.get("MATH_LOG_OVERFLOW", "block")
+SAMPLE_EVERY = int(os.environ.get("MATH_LOG_SAMPLE_EVERY", 10))
+OVERFLOW_POLICIES = ("block", "drop-oldest", "sample")
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class OperationLogWriter:
+    """Bounded queue of log rows drained by a background thread with executemany batches.
+
+    When the queue is full, ``block`` waits for room, ``drop-oldest`` discards the oldest
+    queued row, and ``sample`` keeps one of every ``sample_every`` overflowing rows.
+    Until ``start()`` is called rows are written synchronously.
+
+    Coroutines use the ``*_async`` variants, which do any waiting in a worker thread
+    rather than on the event loop.
+    """
+
+    def __init__(self, queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, overflow: str = OVERFLOW_POLICY,
+                 sample_every: int = SAMPLE_EVERY):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._overflowed = 0
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="operation-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write everything still queued, then stop the writer thread."""
+        if self.running:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def flush(self):
+        """Block until every row enqueued so far has been committed."""
+        if self.running:
+            self._queue.join()
+
+    def enqueue(self, operation: str, input_data: str, result: str):
+        row = (operation, input_data, result, datetime.utcnow().isoformat())
+        if not self.running:
+            self._write([row])
+            return
+        self._put(row)
+
+    def enqueue_many(self, rows: list):
+        timestamp = datetime.utcnow().isoformat()
+        rows = [(operation, input_data, result, timestamp) for operation, input_data, result in rows]
+        if not self.running:
+            self._write(rows)
+            return
+        for row in rows:
+            self._put(row)
+
+    async def enqueue_async(self, operation: str, input_data: str, result: str):
+        await self.enqueue_many_async([(operation, input_data, result)])
+
+    async def enqueue_many_async(self, rows: list):
+        """enqueue_many() for the event loop: a full queue is waited on in a worker thread."""
+        timestamp = datetime.utcnow().isoformat()
+        rows = [(operation, input_data, result, timestamp) for operation, input_data, result in rows]
+        if not self.running:
+            await asyncio.to_thread(self._write, rows)
+            return
+        for i, row in enumerate(rows):
+            if not self._put(row, wait=False):
+                await asyncio.to_thread(self._put_waiting, rows[i:])
+                return
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "overflow": self.overflow,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _write(self, rows: list):
+        insert_logs(rows)
+        self.written += len(rows)
+
+    def _put_blocking(self, row):
+        self._queue.put(row)
+        self.enqueued += 1
+
+    def _put_waiting(self, rows: list):
+        # rows[0] is a row _put(wait=False) gave back: it has been through the policy and waits for room.
+        self._put_blocking(rows[0])
+        for row in rows[1:]:
+            self._put(row)
+
+    def _put(self, row, wait: bool = True) -> bool:
+        """Queue row under the overflow policy; False, with nothing queued, if it would have
+        to wait for room and ``wait`` is False."""
+        try:
+            self._queue.put_nowait(row)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            pass
+        if self.overflow == "block":
+            if not wait:
+                return False
+            self._put_blocking(row)
+            return True
+        if self.overflow == "sample":
+            self._overflowed += 1
+            if self._overflowed % self.sample_every:
+                self.dropped += 1
+                return True
+            if not wait:
+                return False
+            self._put_blocking(row)
+            return True
+        while True:
+            try:
+                oldest = self._queue.get_nowait()
+                self._queue.task_done()
+                if oldest is _STOP:
+                    # stop() is waiting for the writer to reach this; keep it, drop the new row.
+                    self._queue.put(_STOP)
+                    self.dropped += 1
+                    return True
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(row)
+                self.enqueued += 1
+                return True
+            except queue.Full:
+                continue
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    row = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(row)
+            try:
+                insert_logs(batch)
+                self.written += len(batch)
+            except Exception:
+                logger.exception("Failed to write %d operation log rows", len(batch))
+                self.dropped += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+log_writer = OperationLogWriter()
@@ -0,0 +1,124 @@
+import mmap
+import os
+import struct
+import threading
+
+from app.math_ops import fibonacci_many, factorial_many
+
+LOOKUP_TABLE_PATH = os.environ.get("MATH_LOOKUP_TABLE", "lookup_tables.bin")
+# Largest n the generator precomputes by default.
+DEFAULT_MAX_N = int(os.environ.get("MATH_LOOKUP_MAX_N", 5000))
+TABLE_BUILDERS = {"fibonacci": fibonacci_many, "factorial": factorial_many}
+
+# File layout, all little-endian:
+#   header   magic, version, entry count per table (in TABLE_BUILDERS order)
+#   index    per table, count + 1 uint64 offsets into the payload area; value n is
+#            payload[index[n]:index[n + 1]]
+#   payload  unsigned little-endian integers, minimal length (0 is empty)
+_MAGIC = b"MLUT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sI" + "Q" * len(TABLE_BUILDERS))
+_OFFSET = struct.Struct("<Q")
+_OFFSET_PAIR = struct.Struct("<QQ")
+
+
+def write_table(path: str, sizes: dict) -> dict:
+    """Precompute f(0..size-1) for each operation in ``sizes`` and write the table file.
+
+    The file is written next to ``path`` and renamed over it, so a running service that
+    has the old file mapped keeps reading a consistent copy.
+    """
+    counts = [sizes.get(operation, 0) for operation in TABLE_BUILDERS]
+    payloads = []
+    for (operation, builder), count in zip(TABLE_BUILDERS.items(), counts):
+        values = builder(list(range(count))) if count else []
+        payloads.append([value.to_bytes((value.bit_length() + 7) // 8, "little") for value in values])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, *counts))
+        offset = 0
+        for chunks in payloads:
+            offsets = [offset]
+            for chunk in chunks:
+                offset += len(chunk)
+                offsets.append(offset)
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        for chunks in payloads:
+            f.writelines(chunks)
+    os.replace(tmp_path, path)
+    return {"path": path, "bytes": os.path.getsize(path), **dict(zip(TABLE_BUILDERS, counts))}
+
+
+class LookupTable:
+    """Memory-mapped fibonacci/factorial tables written by ``write_table``.
+
+    Lookups read the offsets and the payload straight out of the mapping; the only
+    allocation is the int handed back to the caller.
+    """
+
+    def __init__(self, path: str = LOOKUP_TABLE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map = None
+        self._tables = {}  # operation -> (index position, count)
+        self._payload_start = 0
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, path: str = None) -> bool:
+        """Map the table file; returns False (and serves nothing) if it is missing or not a table."""
+        self.close()
+        self.path = path or self.path
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: empty file
+            return False
+        if len(mapped) < _HEADER.size or mapped[:4] != _MAGIC or _HEADER.unpack_from(mapped)[1] != _VERSION:
+            mapped.close()
+            return False
+        counts = _HEADER.unpack_from(mapped)[2:]
+        tables, position = {}, _HEADER.size
+        for operation, count in zip(TABLE_BUILDERS, counts):
+            tables[operation] = (position, count)
+            position += (count + 1) * _OFFSET.size
+        with self._lock:
+            self._map, self._tables, self._payload_start = mapped, tables, position
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            mapped = self._map
+            self._map, self._tables = None, {}
+        if mapped is not None:
+            mapped.close()
+
+    def get(self, operation: str, n: int):
+        """operation(n) from the table, or None if the table does not cover it."""
+        if operation not in TABLE_BUILDERS:
+            return None
+        with self._lock:
+            table = self._tables.get(operation)
+            if table is None or not 0 <= n < table[1]:
+                self.misses += 1
+                return None
+            start, end = _OFFSET_PAIR.unpack_from(self._map, table[0] + n * _OFFSET.size)
+            base = self._payload_start
+            with memoryview(self._map) as view:
+                value = int.from_bytes(view[base + start:base + end], "little")
+            self.hits += 1
+            return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "loaded": self._map is not None,
+                "bytes": len(self._map) if self._map is not None else 0,
+                "sizes": {operation: count for operation, (_, count) in self._tables.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+lookup_table = LookupTable()
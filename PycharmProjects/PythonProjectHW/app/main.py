@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.routes import router
 from app.db import init_db
+from app.log_writer import log_writer
+from app.executor import math_executor
+from app.cost import BudgetError
+from app.retention import retention_scheduler
+from app.lookup import lookup_table
+from app.metrics import MetricsMiddleware, render_metrics
 
 app = FastAPI(
     title="Math Microservice",
@@ -17,13 +24,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 def on_startup():
     init_db()
+    lookup_table.open()
+    log_writer.start()
+    retention_scheduler.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    retention_scheduler.stop()
+    log_writer.stop()
+    math_executor.shutdown()
+    lookup_table.close()
+
+@app.exception_handler(BudgetError)
+def on_budget_error(request: Request, exc: BudgetError):
+    return JSONResponse(status_code=exc.status_code, content=exc.to_dict())
 
 app.include_router(router)
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def root():
     return {"message": "Welcome to the Math Microservice!"}
@@ -1,7 +1,82 @@
+import decimal
+import functools
+import math
+
 def power(x: int, y: int) -> int:
     return x ** y
 
-def fibonacci(n: int) -> int:
+POWER_MODES = ("exact", "mod", "leading", "last", "bits")
+
+def _log10_power(x: int, y: int, extra_digits: int) -> decimal.Decimal:
+    # y * log10|x| with enough precision that its integer and first fractional digits are exact.
+    ctx = decimal.Context(prec=len(str(abs(y))) + extra_digits + 10)
+    return ctx.multiply(decimal.Decimal(y), ctx.divide(ctx.ln(decimal.Decimal(abs(x))), ctx.ln(decimal.Decimal(10))))
+
+def power_mod(x: int, y: int, modulus: int) -> int:
+    return pow(x, y, modulus)
+
+def power_last_digits(x: int, y: int, digits: int) -> int:
+    # Last digits of |x**y|, negative if x**y is (pow with a modulus would give 10**digits - them).
+    last = pow(abs(x), y, 10 ** digits)
+    return -last if x < 0 and y % 2 else last
+
+def power_bit_length(x: int, y: int) -> int:
+    base = abs(x)
+    if base == 0:
+        return 0 if y > 0 else 1
+    if base == 1 or y == 0:
+        return 1
+    if base & (base - 1) == 0:
+        return y * (base.bit_length() - 1) + 1
+    ctx = decimal.Context(prec=len(str(y)) + 20)
+    return int(ctx.divide(_log10_power(base, y, 10), ctx.log10(decimal.Decimal(2)))) + 1
+
+def power_leading_digits(x: int, y: int, digits: int) -> tuple:
+    """First ``digits`` digits of x**y (negative if x**y is) and log10|x**y|, without computing x**y."""
+    base = abs(x)
+    if base <= 1:
+        return power(x, y), (0.0 if base == 1 else float("-inf"))
+    # base = m * 10**k: trailing zeros only shift the result, and when m**y is short its
+    # digits are computed exactly (a rounded logarithm can land just under a digit boundary).
+    stripped = str(base).rstrip("0")
+    zeros, m = len(str(base)) - len(stripped), int(stripped)
+    if (m.bit_length() - 1) * y <= 4 * digits + 128:
+        exact = str(m ** y)
+        log10 = float(decimal.Decimal(exact).log10()) + zeros * y
+        if len(exact) + zeros * y <= digits:
+            return power(x, y), log10
+        leading = int(exact[:digits].ljust(digits, "0"))
+        return (-leading if x < 0 and y % 2 else leading), log10
+    log10 = _log10_power(base, y, digits)
+    total_digits = int(log10) + 1
+    if total_digits <= digits:
+        return power(x, y), float(log10)
+    ctx = decimal.Context(prec=log10.adjusted() + digits + 10)
+    leading = int(ctx.power(10, ctx.add(ctx.subtract(log10, int(log10)), digits - 1)))
+    return (-leading if x < 0 and y % 2 else leading), float(log10)
+
+def power_variant(x: int, y: int, mode: str = "exact", modulus: int = None, digits: int = None):
+    """x**y or a cheaper view of it; returns (result, log10 or None). Raises ValueError on bad arguments."""
+    if mode not in POWER_MODES:
+        raise ValueError(f"Unknown power mode: {mode}")
+    if mode == "exact":
+        return power(x, y), None
+    if mode == "mod":
+        if not modulus or modulus < 1:
+            raise ValueError("mode 'mod' needs a positive modulus")
+        return power_mod(x, y, modulus), None
+    if y < 0:
+        raise ValueError(f"mode '{mode}' needs a non-negative exponent")
+    if mode == "bits":
+        return power_bit_length(x, y), None
+    if not digits or digits < 1:
+        raise ValueError(f"mode '{mode}' needs digits >= 1")
+    if mode == "last":
+        return power_last_digits(x, y, digits), None
+    return power_leading_digits(x, y, digits)
+
+def fibonacci_iterative(n: int) -> int:
+    # Reference engine: O(n) additions, kept for cross-checks and benchmarks.
     if n <= 1:
         return n
     a, b = 0, 1
@@ -9,10 +84,284 @@ def fibonacci(n: int) -> int:
         a, b = b, a + b
     return b
 
-def factorial(n: int) -> int:
+def _fibonacci_pair(n: int) -> tuple:
+    # Fast doubling: F(2k) = F(k) * (2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2,
+    # walking the bits of n from the top for O(log n) big-int multiplications.
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * ((b << 1) - a)
+        d = a * a + b * b
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a, b
+
+def fibonacci_doubling(n: int) -> int:
+    if n <= 1:
+        return n
+    return _fibonacci_pair(n)[0]
+
+FIBONACCI_ENGINES = {
+    "doubling": fibonacci_doubling,
+    "iterative": fibonacci_iterative,
+}
+
+def fibonacci(n: int, engine: str = "doubling") -> int:
+    return FIBONACCI_ENGINES[engine](n)
+
+def factorial_iterative(n: int) -> int:
+    # Reference engine: one big-by-small multiplication per step, O(n^2) overall.
     if n == 0 or n == 1:
         return 1
     result = 1
     for i in range(2, n + 1):
         result *= i
     return result
+
+SMALL_FACTORIAL_LIMIT = 170
+
+_SMALL_FACTORIALS = [1]
+for _i in range(1, SMALL_FACTORIAL_LIMIT + 1):
+    _SMALL_FACTORIALS.append(_SMALL_FACTORIALS[-1] * _i)
+
+def _odd_product(lo: int, hi: int) -> int:
+    # Product of the odd numbers in (lo, hi], split in halves so both operands grow together.
+    if hi - lo < 32:
+        result = 1
+        for i in range((lo + 1) | 1, hi + 1, 2):
+            result *= i
+        return result
+    mid = (lo + hi) // 2
+    return _odd_product(lo, mid) * _odd_product(mid, hi)
+
+def factorial_split(n: int) -> int:
+    # Binary splitting: n! = 2^(n - popcount(n)) * prod_i oddprod(n >> i), with each
+    # odd product built incrementally from the bands (n >> (i+1), n >> i].
+    if n <= SMALL_FACTORIAL_LIMIT:
+        return _SMALL_FACTORIALS[n] if n > 0 else 1
+    odd, result = 1, 1
+    for i in range(n.bit_length() - 1, -1, -1):
+        odd *= _odd_product(n >> (i + 1), n >> i)
+        result *= odd
+    return result << (n - bin(n).count("1"))
+
+FACTORIAL_ENGINES = {
+    "split": factorial_split,
+    "iterative": factorial_iterative,
+}
+
+def factorial(n: int, engine: str = "split") -> int:
+    return FACTORIAL_ENGINES[engine](n)
+
+def power_many(items: list) -> list:
+    # Items are power_variant argument tuples, (x, y) for exact powers; returns (result, log10) pairs.
+    return [power_variant(*item) for item in items]
+
+FIBONACCI_SWEEP_MAX_GAP = 256
+
+def fibonacci_many(ns: list) -> list:
+    # One ascending sweep: short gaps are walked with additions, long ones jump by fast doubling.
+    results = {}
+    k, a, b = 0, 0, 1  # a = F(k), b = F(k + 1)
+    for n in sorted(set(ns)):
+        if n <= 1:
+            results[n] = n
+            continue
+        if n - k > FIBONACCI_SWEEP_MAX_GAP:
+            k, (a, b) = n, _fibonacci_pair(n)
+        while k < n:
+            k, a, b = k + 1, b, a + b
+        results[n] = a
+    return [results[n] for n in ns]
+
+def _range_product(lo: int, hi: int) -> int:
+    # Product of the integers in (lo, hi], split in halves to keep operand sizes balanced.
+    if hi - lo < 16:
+        result = 1
+        for i in range(lo + 1, hi + 1):
+            result *= i
+        return result
+    mid = (lo + hi) // 2
+    return _range_product(lo, mid) * _range_product(mid, hi)
+
+def factorial_many(ns: list) -> list:
+    # Ascending prefix products: each n! extends the previous one by the product of (prev, n].
+    results = {}
+    prev, acc = None, 1
+    for n in sorted(set(ns)):
+        if n <= 1:
+            results[n] = 1
+            continue
+        acc = factorial_split(n) if prev is None else acc * _range_product(prev, n)
+        results[n] = acc
+        prev = n
+    return [results[n] for n in ns]
+
+# Modular variants: results stay below the modulus, so n can be far beyond what the exact
+# engines finish. Per-modulus work (factorisations, Pisano periods, CRT bases) is memoised.
+MODULUS_CACHE_SIZE = 1024
+# Composite moduli are factored by Pollard's rho, which is only quick up to about this size.
+FACTORIZE_MAX_BITS = 64
+# Consecutive factors multiplied by math.prod before each reduction.
+PRODUCT_MOD_CHUNK = 32
+
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+def is_probable_prime(n: int) -> bool:
+    # Miller-Rabin on the first 13 primes as bases: deterministic below 3.3 * 10**24.
+    if n < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    s = ((n - 1) & -(n - 1)).bit_length() - 1
+    d = (n - 1) >> s
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def _pollard_rho(n: int) -> int:
+    # Brent's variant with batched gcds; returns a non-trivial factor of the odd composite n.
+    for c in range(1, n):
+        y, r, q, g = 2, 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += 128
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+@functools.lru_cache(maxsize=MODULUS_CACHE_SIZE)
+def _factorize(n: int) -> tuple:
+    # ((p, e), ...) with p increasing; trial division first, then Pollard's rho.
+    factors = {}
+    for p in range(2, 1000):
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    pending = [n] if n > 1 else []
+    while pending:
+        m = pending.pop()
+        if is_probable_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d = _pollard_rho(m)
+            pending += [d, m // d]
+    return tuple(sorted(factors.items()))
+
+def _fibonacci_pair_mod(n: int, m: int) -> tuple:
+    # _fibonacci_pair with every step reduced mod m.
+    a, b = 0, 1 % m
+    for bit in bin(n)[2:]:
+        c = a * ((b << 1) - a) % m
+        d = (a * a + b * b) % m
+        if bit == "1":
+            a, b = d, (c + d) % m
+        else:
+            a, b = c, d
+    return a, b
+
+def _prime_pisano_period(p: int) -> int:
+    # pi(p) divides p - 1 when p = +-1 (mod 5) and 2(p + 1) when p = +-2 (mod 5);
+    # strip prime factors from that bound while F(k), F(k + 1) = 0, 1 still holds.
+    if p == 2:
+        return 3
+    if p == 5:
+        return 20
+    period = p - 1 if p % 5 in (1, 4) else 2 * (p + 1)
+    for q, _ in _factorize(period):
+        while period % q == 0 and _fibonacci_pair_mod(period // q, p) == (0, 1):
+            period //= q
+    return period
+
+@functools.lru_cache(maxsize=MODULUS_CACHE_SIZE)
+def pisano_period(m: int) -> int:
+    """Period of F(n) mod m, from the periods of m's prime factors.
+
+    For a prime power p**e this uses p**(e-1) * pi(p), which pi(p**e) always divides and
+    (Wall's conjecture) equals for every prime checked so far, so F(n % period) is exact.
+    """
+    period = 1
+    for p, e in _factorize(m):
+        period = math.lcm(period, _prime_pisano_period(p) * p ** (e - 1))
+    return period
+
+def fibonacci_mod(n: int, m: int) -> int:
+    if n < 0 or m < 1:
+        raise ValueError("fibonacci_mod needs n >= 0 and m >= 1")
+    # pi(m) <= 6m, so the shortcut only pays off once n is past that.
+    if n > 6 * m and m.bit_length() <= FACTORIZE_MAX_BITS:
+        n %= pisano_period(m)
+    return _fibonacci_pair_mod(n, m)[0]
+
+def _product_mod(lo: int, hi: int, m: int) -> int:
+    # Product of the integers in [lo, hi) mod m; stops early once it reaches 0.
+    result = 1 % m
+    for start in range(lo, hi, PRODUCT_MOD_CHUNK):
+        result = result * math.prod(range(start, min(start + PRODUCT_MOD_CHUNK, hi))) % m
+        if result == 0:
+            break
+    return result
+
+def _factorial_mod_prime(n: int, p: int) -> int:
+    # Wilson: (p-1)! = -1 (mod p), so n! = -1 / ((n+1) ... (p-1)) when that product is shorter.
+    if n >= p:
+        return 0
+    if p - 1 - n < n:
+        return -pow(_product_mod(n + 1, p, p), -1, p) % p
+    return _product_mod(1, n + 1, p)
+
+@functools.lru_cache(maxsize=MODULUS_CACHE_SIZE)
+def _crt_basis(m: int) -> tuple:
+    # ((p, e, q, c), ...) for m = prod q with q = p**e: sum(r_q * c) % m has residue r_q mod q.
+    basis = []
+    for p, e in _factorize(m):
+        q = p ** e
+        rest = m // q
+        basis.append((p, e, q, rest * pow(rest, -1, q)))
+    return tuple(basis)
+
+def factorial_mod(n: int, m: int) -> int:
+    """n! mod m. Prime moduli use Wilson's theorem; composite ones are split into prime
+    powers (Legendre: p**e divides n! once n >= p*e) and recombined with the CRT."""
+    if n < 0 or m < 1:
+        raise ValueError("factorial_mod needs n >= 0 and m >= 1")
+    if n >= m:
+        return 0  # m is one of the factors
+    if is_probable_prime(m):
+        return _factorial_mod_prime(n, m)
+    if m.bit_length() > FACTORIZE_MAX_BITS:
+        raise ValueError(f"Composite moduli above {FACTORIZE_MAX_BITS} bits are not supported")
+    result = 0
+    for p, e, q, coefficient in _crt_basis(m):
+        if e == 1:
+            residue = _factorial_mod_prime(n, p)
+        elif n >= p * e:
+            residue = 0
+        else:
+            residue = _product_mod(1, n + 1, q)
+        result += residue * coefficient
+    return result % m
@@ -0,0 +1,192 @@
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BITS_BUCKETS = tuple(4 ** k for k in range(3, 17))
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [f"{self.name}{_format_labels(self.labels, key)} {value}"
+                                   for key, value in values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            snapshot = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        lines = super().render()
+        for key, (counts, total) in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "End-to-end request latency",
+                            ("method", "route", "status"))
+STAGE_SECONDS = Histogram("request_stage_duration_seconds",
+                          "Time spent per request stage (validation, cache, compute, log, serialization)",
+                          ("route", "stage"))
+RESULT_BITS = Histogram("operation_result_bits", "Bit length of computed results", ("operation",),
+                        buckets=BITS_BUCKETS)
+DB_COMMIT_SECONDS = Histogram("db_commit_duration_seconds", "Time to write and commit a batch of log rows")
+DB_ROWS_WRITTEN = Counter("db_rows_written_total", "Log rows committed to SQLite")
+COALESCED_REQUESTS = Counter("coalesced_requests_total",
+                             "Requests that waited on an identical in-flight computation", ("operation",))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _RequestTimings:
+    __slots__ = ("handler_start", "handler_end", "stages")
+
+    def __init__(self):
+        self.handler_start = None
+        self.handler_end = None
+        self.stages = []
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def instrumented(handler):
+    """Mark the start and end of an async route handler for the stage breakdown."""
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.handler_start = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            if timings is not None:
+                timings.handler_end = time.perf_counter()
+    return wrapper
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage of the current request (a no-op outside a request)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.stages.append((name, time.perf_counter() - start))
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware: request latency, in-flight gauge, and the pre/post-handler stages.
+
+    Time before the handler starts is reported as "validation" (routing, body parsing,
+    pydantic); time after it returns until the last body chunk is "serialization".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = _RequestTimings()
+        token = _current.set(timings)
+        status = [500]
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(end - start, scope["method"], route, str(status[0]))
+            if timings.handler_start is not None:
+                STAGE_SECONDS.observe(timings.handler_start - start, route, "validation")
+                for name, seconds in timings.stages:
+                    STAGE_SECONDS.observe(seconds, route, name)
+                if timings.handler_end is not None:
+                    STAGE_SECONDS.observe(end - timings.handler_end, route, "serialization")
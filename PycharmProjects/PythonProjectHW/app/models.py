@@ -1,11 +1,21 @@
-from pydantic import BaseModel
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
 
 class PowerRequest(BaseModel):
     x: int
     y: int
+    # exact: x**y; mod: x**y % modulus; leading/last: first/last `digits` digits; bits: bit length.
+    mode: Literal["exact", "mod", "leading", "last", "bits"] = "exact"
+    modulus: Optional[int] = Field(None, ge=1)
+    digits: Optional[int] = Field(None, ge=1, le=5000)
 
 class SingleIntRequest(BaseModel):
     n: int
 
+class ModularRequest(BaseModel):
+    n: int = Field(..., ge=0)
+    modulus: int = Field(..., ge=1)
+
 class OperationResponse(BaseModel):
     result: int
+    log10: Optional[float] = None
@@ -0,0 +1,77 @@
+import decimal
+import json
+import zlib
+
+from app.streaming import decimal_context, int_to_decimal, int_to_str, str_to_int
+
+RESULT_FORMATS = ("text", "blob", "zlib", "lzma", "digest")
+DIGEST_EDGE_DIGITS = 20
+
+
+def int_to_bytes(n: int) -> bytes:
+    return n.to_bytes((n.bit_length() + 8) // 8, "big", signed=True)
+
+
+def int_from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, "big", signed=True)
+
+
+def digest(n: int) -> dict:
+    """Length, hash and leading/trailing digits of n, without building its decimal string."""
+    import hashlib  # loads OpenSSL; only digest rows need it
+
+    magnitude = abs(n)
+    as_decimal = int_to_decimal(magnitude)
+    digits = as_decimal.adjusted() + 1 if magnitude else 1
+    edge = min(DIGEST_EDGE_DIGITS, digits)
+    ctx = decimal_context()
+    leading = ctx.scaleb(as_decimal, edge - digits).to_integral_value(rounding=decimal.ROUND_DOWN, context=ctx)
+    return {
+        "sign": -1 if n < 0 else 1,
+        "digits": digits,
+        "sha256": hashlib.sha256(int_to_bytes(n)).hexdigest(),
+        "leading": str(int(leading)),
+        "trailing": str(magnitude % 10 ** edge).zfill(edge),
+    }
+
+
+def encode_result(value, result_format: str = "text"):
+    """Encode a result for the logs table; returns (payload, format actually used)."""
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format: {result_format}")
+    if not isinstance(value, int):
+        return str(value), "text"
+    if result_format == "text":
+        return int_to_str(value), "text"
+    if result_format == "blob":
+        return int_to_bytes(value), "blob"
+    if result_format == "zlib":
+        return zlib.compress(int_to_bytes(value)), "zlib"
+    if result_format == "lzma":
+        import lzma
+
+        return lzma.compress(int_to_bytes(value)), "lzma"
+    return json.dumps(digest(value)), "digest"
+
+
+def decode_result(payload, result_format: str = None):
+    """Decode a stored result: an int for every format except digest, which gives a dict.
+
+    Rows written before the result_format column existed have it NULL and hold text.
+    """
+    if result_format in (None, "text"):
+        try:
+            return str_to_int(payload)
+        except (TypeError, ValueError):
+            return payload
+    if result_format == "blob":
+        return int_from_bytes(payload)
+    if result_format == "zlib":
+        return int_from_bytes(zlib.decompress(payload))
+    if result_format == "lzma":
+        import lzma
+
+        return int_from_bytes(lzma.decompress(payload))
+    if result_format == "digest":
+        return json.loads(payload)
+    raise ValueError(f"Unknown result format: {result_format}")
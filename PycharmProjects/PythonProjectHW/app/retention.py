@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.db import connect, BUCKET_MS
+
+RETENTION_DAYS = float(os.environ.get("MATH_RETENTION_DAYS", 7))
+ARCHIVE_DIR = os.environ.get("MATH_ARCHIVE_DIR", "archive")
+VACUUM_PAGES = int(os.environ.get("MATH_VACUUM_PAGES", 1000))
+# Seconds between background runs in the API process; 0 turns the scheduler off.
+RETENTION_INTERVAL = float(os.environ.get("MATH_RETENTION_INTERVAL", 0))
+ROLLUP_BUCKETS = ("minute", "hour")
+DAY_MS = BUCKET_MS["day"]
+
+LOG_COLUMNS = "id, operation, input, result, timestamp, result_format, epoch_ms, input_size"
+
+
+def _create_tables(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS retention_state (key TEXT PRIMARY KEY, value INTEGER)")
+    for bucket in ROLLUP_BUCKETS:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS logs_rollup_{bucket} (
+                operation TEXT,
+                bucket_ms INTEGER,
+                count INTEGER,
+                sum_input_size INTEGER,
+                min_input_size INTEGER,
+                max_input_size INTEGER,
+                PRIMARY KEY (operation, bucket_ms)
+            )
+        ''')
+
+
+def _state(conn, key: str) -> int:
+    row = conn.execute("SELECT value FROM retention_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def rollup(conn) -> int:
+    """Fold raw rows newer than the stored watermark into the rollup tables; returns rows folded."""
+    last_id = _state(conn, "rollup_last_id")
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+    if max_id <= last_id:
+        return 0
+    with conn:
+        for bucket in ROLLUP_BUCKETS:
+            width = BUCKET_MS[bucket]
+            conn.execute(f'''
+                INSERT INTO logs_rollup_{bucket}
+                SELECT operation, epoch_ms / {width} * {width}, COUNT(*),
+                       SUM(input_size), MIN(input_size), MAX(input_size)
+                FROM logs WHERE id > ? AND id <= ?
+                GROUP BY operation, epoch_ms / {width}
+                ON CONFLICT (operation, bucket_ms) DO UPDATE SET
+                    count = count + excluded.count,
+                    sum_input_size = COALESCE(sum_input_size, 0) + COALESCE(excluded.sum_input_size, 0),
+                    min_input_size = MIN(COALESCE(min_input_size, excluded.min_input_size),
+                                         COALESCE(excluded.min_input_size, min_input_size)),
+                    max_input_size = MAX(COALESCE(max_input_size, excluded.max_input_size),
+                                         COALESCE(excluded.max_input_size, max_input_size))
+            ''', (last_id, max_id))
+        conn.execute("INSERT OR REPLACE INTO retention_state VALUES ('rollup_last_id', ?)", (max_id,))
+    return max_id - last_id
+
+
+def archive(conn, cutoff_ms: int, archive_dir: str) -> int:
+    """Move rolled-up raw rows older than cutoff_ms into one SQLite file per UTC day."""
+    last_id = _state(conn, "rollup_last_id")
+    days = [row[0] for row in conn.execute(
+        "SELECT DISTINCT epoch_ms / ? FROM logs WHERE epoch_ms < ? AND id <= ?",
+        (DAY_MS, cutoff_ms, last_id))]
+    moved = 0
+    for day in days:
+        os.makedirs(archive_dir, exist_ok=True)
+        date = datetime.fromtimestamp(day * DAY_MS / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        conn.execute("ATTACH DATABASE ? AS archive", (os.path.join(archive_dir, f"operations-{date}.db"),))
+        try:
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS archive.logs (
+                        id INTEGER PRIMARY KEY,
+                        operation TEXT,
+                        input TEXT,
+                        result TEXT,
+                        timestamp TEXT,
+                        result_format TEXT,
+                        epoch_ms INTEGER,
+                        input_size INTEGER
+                    )
+                ''')
+                bounds = (day * DAY_MS, min((day + 1) * DAY_MS, cutoff_ms), last_id)
+                where = "epoch_ms >= ? AND epoch_ms < ? AND id <= ?"
+                conn.execute(f"INSERT OR IGNORE INTO archive.logs ({LOG_COLUMNS}) "
+                             f"SELECT {LOG_COLUMNS} FROM main.logs WHERE {where}", bounds)
+                moved += conn.execute(f"DELETE FROM main.logs WHERE {where}", bounds).rowcount
+        finally:
+            conn.execute("DETACH DATABASE archive")
+    return moved
+
+
+def incremental_vacuum(conn, pages: int, convert: bool = False) -> int:
+    """Hand up to ``pages`` free pages back to the OS; returns the free pages left.
+
+    A database created before auto_vacuum was on frees nothing unless ``convert`` is set.
+    Converting takes a full VACUUM, which holds the write lock for as long as it runs, so
+    only `cli retention` does it, never the scheduler inside the API.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        if not convert:
+            return conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def run_retention(retention_days: float = RETENTION_DAYS, archive_dir: str = ARCHIVE_DIR,
+                  vacuum_pages: int = VACUUM_PAGES, now: datetime = None,
+                  convert_vacuum: bool = False) -> dict:
+    """Roll up, archive and vacuum once. Safe to run repeatedly or concurrently with writers,
+    except with ``convert_vacuum`` (see incremental_vacuum)."""
+    now = now or datetime.now(timezone.utc)
+    cutoff_ms = int(now.timestamp() * 1000 - retention_days * DAY_MS)
+    conn = connect()
+    try:
+        with conn:
+            _create_tables(conn)
+        rolled_up = rollup(conn)
+        archived = archive(conn, cutoff_ms, archive_dir)
+        free_pages = incremental_vacuum(conn, vacuum_pages, convert_vacuum)
+    finally:
+        conn.close()
+    return {"rolled_up": rolled_up, "archived": archived, "free_pages": free_pages}
+
+
+class RetentionScheduler:
+    """Runs run_retention every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, interval: float = RETENTION_INTERVAL):
+        self.interval = interval
+        self.last_result = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            started = time.monotonic()
+            try:
+                self.last_result = dict(run_retention(), seconds=round(time.monotonic() - started, 3))
+            except Exception as e:
+                self.last_result = {"error": str(e)}
+
+
+retention_scheduler = RetentionScheduler()
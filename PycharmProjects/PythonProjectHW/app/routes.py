@@ -1,24 +1,209 @@
-from fastapi import APIRouter
-from app.models import PowerRequest, SingleIntRequest, OperationResponse
-from app.math_ops import power, fibonacci, factorial
-from app.db import log_operation
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.models import PowerRequest, SingleIntRequest, ModularRequest, OperationResponse
+from app.math_ops import (power, power_variant, fibonacci, factorial, fibonacci_mod, factorial_mod,
+                          power_many, fibonacci_many, factorial_many)
+from app.log_writer import log_writer
+from app.db import query_logs, aggregate_logs, to_epoch_ms
+from app.cache import result_cache
+from app.lookup import lookup_table
+from app.single_flight import single_flight
+from app.cost import check_budget, check_batch_budget, estimate_cpu_seconds, cost_limiter
+from app.executor import math_executor, OperationTimeout, PoolUnavailable
+from app.streaming import STREAM_FORMATS, stream_result
+from app.metrics import RESULT_BITS, instrumented, stage
 
 router = APIRouter()
 
+StreamFormat = Optional[Literal["decimal", "hex", "bytes"]]
+
+async def run_math(func, args: tuple, cost_bits: float, cpu_seconds: float = 0.0):
+    try:
+        return await math_executor.run(func, args, cost_bits, cpu_seconds=cpu_seconds)
+    except OperationTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PoolUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def run_limited(func, args: tuple, cost_bits: float, cpu_seconds: float = 0.0):
+    async with cost_limiter.reserve_async(cost_bits):
+        return await run_math(func, args, cost_bits, cpu_seconds)
+
+async def run_and_cache(operation: str, func, args: tuple, cost_bits: float, cpu_seconds: float):
+    result = await run_limited(func, args, cost_bits, cpu_seconds)
+    result_cache.put(operation, args, result)
+    return result
+
+async def compute(operation: str, func, args: tuple):
+    cost_bits = check_budget(operation, args)
+    cpu_seconds = estimate_cpu_seconds(operation, args)
+    with stage("cache"):
+        result = lookup_table.get(operation, args[0])
+        if result is None:
+            result = result_cache.get(operation, args)
+    if result is None:
+        with stage("compute"):
+            result = await single_flight.do_async(
+                operation, args, lambda: run_and_cache(operation, func, args, cost_bits, cpu_seconds))
+    if isinstance(result, int):
+        RESULT_BITS.observe(result.bit_length(), operation)
+    return result
+
+def respond(result, stream: StreamFormat, log10: float = None):
+    if stream is None:
+        return {"result": result, "log10": log10}
+    try:
+        # Checks the format against the result (hex and bytes need an int) before streaming.
+        chunks = stream_result(result, stream)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(chunks, media_type=STREAM_FORMATS[stream])
+
+def power_args(data: PowerRequest) -> tuple:
+    """Arguments for compute(); raises ValueError for a request that has no integer result."""
+    if data.mode == "exact":
+        if data.y < 0:
+            # x ** -y is a float (or a ZeroDivisionError for x = 0), not an int result.
+            raise ValueError("mode 'exact' needs a non-negative exponent")
+        return (data.x, data.y)
+    return (data.x, data.y, data.mode, data.modulus, data.digits)
+
+def power_input(data: PowerRequest) -> str:
+    extra = "".join(f",{name}={getattr(data, name)}" for name in ("modulus", "digits")
+                    if getattr(data, name) is not None)
+    return f"x={data.x},y={data.y}" if data.mode == "exact" else f"x={data.x},y={data.y},mode={data.mode}{extra}"
+
 @router.post("/power", response_model=OperationResponse)
-def calculate_power(data: PowerRequest):
-    result = power(data.x, data.y)
-    log_operation("power", f"x={data.x},y={data.y}", str(result))
-    return {"result": result}
+@instrumented
+async def calculate_power(data: PowerRequest, stream: StreamFormat = None):
+    try:
+        if data.mode == "exact":
+            result, log10 = await compute("power", power, power_args(data)), None
+        else:
+            result, log10 = await compute("power", power_variant, power_args(data))
+    except (ValueError, ArithmeticError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage("log"):
+        await log_writer.enqueue_async("power", power_input(data), result)
+    return respond(result, stream, log10)
 
 @router.post("/fibonacci", response_model=OperationResponse)
-def calculate_fibonacci(data: SingleIntRequest):
-    result = fibonacci(data.n)
-    log_operation("fibonacci", f"n={data.n}", str(result))
-    return {"result": result}
+@instrumented
+async def calculate_fibonacci(data: SingleIntRequest, stream: StreamFormat = None):
+    result = await compute("fibonacci", fibonacci, (data.n,))
+    with stage("log"):
+        await log_writer.enqueue_async("fibonacci", f"n={data.n}", result)
+    return respond(result, stream)
 
 @router.post("/factorial", response_model=OperationResponse)
-def calculate_factorial(data: SingleIntRequest):
-    result = factorial(data.n)
-    log_operation("factorial", f"n={data.n}", str(result))
-    return {"result": result}
+@instrumented
+async def calculate_factorial(data: SingleIntRequest, stream: StreamFormat = None):
+    result = await compute("factorial", factorial, (data.n,))
+    with stage("log"):
+        await log_writer.enqueue_async("factorial", f"n={data.n}", result)
+    return respond(result, stream)
+
+@router.post("/fibonacci/mod", response_model=OperationResponse)
+@instrumented
+async def calculate_fibonacci_mod(data: ModularRequest):
+    result = await compute("fibonacci_mod", fibonacci_mod, (data.n, data.modulus))
+    with stage("log"):
+        await log_writer.enqueue_async("fibonacci_mod", f"n={data.n},modulus={data.modulus}", result)
+    return respond(result, None)
+
+@router.post("/factorial/mod", response_model=OperationResponse)
+@instrumented
+async def calculate_factorial_mod(data: ModularRequest):
+    try:
+        result = await compute("factorial_mod", factorial_mod, (data.n, data.modulus))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage("log"):
+        await log_writer.enqueue_async("factorial_mod", f"n={data.n},modulus={data.modulus}", result)
+    return respond(result, None)
+
+@router.post("/batch/power", response_model=List[OperationResponse])
+@instrumented
+async def batch_power(data: List[PowerRequest]):
+    try:
+        items = [power_args(item) for item in data]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cost, cpu_seconds = check_batch_budget("power", items)
+    with stage("compute"):
+        try:
+            results = await run_limited(power_many, (items,), cost, cpu_seconds)
+        except (ValueError, ArithmeticError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    with stage("log"):
+        await log_writer.enqueue_many_async([("power", power_input(item), result)
+                                            for item, (result, _) in zip(data, results)])
+    return [{"result": result, "log10": log10} for result, log10 in results]
+
+@router.post("/batch/fibonacci", response_model=List[OperationResponse])
+@instrumented
+async def batch_fibonacci(data: List[SingleIntRequest]):
+    ns = [item.n for item in data]
+    cost, cpu_seconds = check_batch_budget("fibonacci", [(n,) for n in ns])
+    with stage("compute"):
+        results = await run_limited(fibonacci_many, (ns,), cost, cpu_seconds)
+    with stage("log"):
+        await log_writer.enqueue_many_async([("fibonacci", f"n={item.n}", result)
+                                            for item, result in zip(data, results)])
+    return [{"result": result} for result in results]
+
+@router.post("/batch/factorial", response_model=List[OperationResponse])
+@instrumented
+async def batch_factorial(data: List[SingleIntRequest]):
+    ns = [item.n for item in data]
+    cost, cpu_seconds = check_batch_budget("factorial", [(n,) for n in ns])
+    with stage("compute"):
+        results = await run_limited(factorial_many, (ns,), cost, cpu_seconds)
+    with stage("log"):
+        await log_writer.enqueue_many_async([("factorial", f"n={item.n}", result)
+                                            for item, result in zip(data, results)])
+    return [{"result": result} for result in results]
+
+def epoch_range(since: Optional[datetime], until: Optional[datetime]) -> tuple:
+    return (to_epoch_ms(since) if since else None, to_epoch_ms(until) if until else None)
+
+@router.get("/logs")
+def list_logs(operation: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, cursor: Optional[str] = None,
+              limit: int = Query(100, ge=1, le=1000)):
+    try:
+        return query_logs(operation, *epoch_range(since, until), cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/logs/stats")
+def log_stats(operation: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None,
+              bucket: Literal["minute", "hour", "day"] = "minute"):
+    return aggregate_logs(operation, *epoch_range(since, until), bucket=bucket)
+
+@router.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+@router.get("/lookup/stats")
+def lookup_stats():
+    return lookup_table.stats()
+
+@router.get("/log-writer/stats")
+def log_writer_stats():
+    return log_writer.stats()
+
+@router.get("/executor/stats")
+def executor_stats():
+    return math_executor.stats()
+
+@router.get("/single-flight/stats")
+def single_flight_stats():
+    return single_flight.stats()
+
+@router.get("/limiter/stats")
+def limiter_stats():
+    return cost_limiter.stats()
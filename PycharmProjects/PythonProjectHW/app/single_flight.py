@@ -0,0 +1,106 @@
+import threading
+
+from app.metrics import COALESCED_REQUESTS
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical (operation, args) computations into one.
+
+    The first caller runs the computation; callers that arrive while it is in flight
+    wait for it and get the same result, or the same exception (timeouts included).
+    Nothing is remembered once it finishes; that is the result cache's job.
+
+    ``do`` is for threads (sync handlers, the CLI), ``do_async`` for coroutines on the
+    event loop; the two do not coalesce with each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call, for do()
+        self._tasks = {}  # key -> [task, waiters], for do_async(); event loop only
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, operation: str, args: tuple, func):
+        """Return func(), or the result of an identical call already running in another thread."""
+        key = (operation, args)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            COALESCED_REQUESTS.inc(operation)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, operation: str, args: tuple, factory):
+        """Await factory(), or the identical computation already in flight on this loop.
+
+        The computation runs as its own task, so one waiter going away does not cancel it
+        for the others; it is cancelled only when its last waiter is.
+        """
+        import asyncio
+
+        key = (operation, args)
+        entry = self._tasks.get(key)
+        if entry is None:
+            entry = self._tasks[key] = [asyncio.ensure_future(factory()), 0]
+            entry[0].add_done_callback(lambda task: self._finished(key, entry, task))
+            with self._lock:
+                self.executions += 1
+        else:
+            with self._lock:
+                self.coalesced += 1
+            COALESCED_REQUESTS.inc(operation)
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _finished(self, key, entry, task):
+        if self._tasks.get(key) is entry:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter has gone
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
+
+
+single_flight = SingleFlight()
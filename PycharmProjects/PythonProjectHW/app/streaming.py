@@ -0,0 +1,163 @@
+import decimal
+
+# Below these sizes the builtin conversions are fast and well under sys.get_int_max_str_digits().
+DECIMAL_LEAF_BITS = 1024
+DECIMAL_LEAF_DIGITS = 1024
+CHUNK_SIZE = 64 * 1024
+STREAM_FORMATS = {
+    "decimal": "text/plain",
+    "hex": "text/plain",
+    "bytes": "application/octet-stream",
+}
+
+
+def decimal_context() -> decimal.Context:
+    return decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN,
+                           traps=[decimal.Inexact, decimal.InvalidOperation])
+
+
+def int_to_decimal(n: int) -> decimal.Decimal:
+    """Exact int -> Decimal in subquadratic time.
+
+    Splits n by powers of two (cheap shifts) and recombines with libmpdec, whose
+    multiplication is subquadratic, instead of CPython's quadratic int -> str.
+    """
+    with decimal.localcontext(decimal_context()):
+        two = decimal.Decimal(2)
+        powers = {}
+
+        def pow2(w):
+            result = powers.get(w)
+            if result is None:
+                if w <= DECIMAL_LEAF_BITS:
+                    result = two ** w
+                else:
+                    half = w >> 1
+                    result = pow2(half) * pow2(w - half)
+                powers[w] = result
+            return result
+
+        def convert(m, w):
+            if w <= DECIMAL_LEAF_BITS:
+                return decimal.Decimal(m)
+            half = w >> 1
+            hi = m >> half
+            lo = m - (hi << half)
+            return convert(lo, half) + convert(hi, w - half) * pow2(half)
+
+        if n < 0:
+            return -convert(-n, (-n).bit_length())
+        return convert(n, n.bit_length())
+
+
+def iter_decimal_digits(n: int):
+    """Yield the decimal digits of n, most significant first, in small pieces.
+
+    The int is converted once with int_to_decimal and then split top-down on
+    powers of ten, which for a Decimal is an exponent shift, so only one path of
+    the split tree is materialized at a time.
+    """
+    if not isinstance(n, int):
+        yield str(n)
+        return
+    if n.bit_length() <= DECIMAL_LEAF_BITS:
+        yield str(n)
+        return
+    if n < 0:
+        yield "-"
+        n = -n
+    # The context is passed explicitly: a generator may be resumed on another thread
+    # (StreamingResponse iterates in a threadpool), where localcontext() would not apply.
+    ctx = decimal_context()
+    value = int_to_decimal(n)
+
+    def split(d, ndigits, pad):
+        if ndigits <= DECIMAL_LEAF_DIGITS:
+            text = str(d)
+            yield text.zfill(ndigits) if pad else text
+            return
+        low_digits = ndigits // 2
+        hi = ctx.scaleb(d, -low_digits).to_integral_value(rounding=decimal.ROUND_DOWN, context=ctx)
+        lo = ctx.subtract(d, ctx.scaleb(hi, low_digits))
+        yield from split(hi, ndigits - low_digits, pad)
+        yield from split(lo, low_digits, True)
+
+    yield from split(value, value.adjusted() + 1, False)
+
+
+def int_to_str(n: int) -> str:
+    """str(n) without the quadratic cost or the int_max_str_digits limit for huge ints."""
+    if not isinstance(n, int) or n.bit_length() <= DECIMAL_LEAF_BITS:
+        return str(n)
+    return "".join(iter_decimal_digits(n))
+
+
+def str_to_int(text: str) -> int:
+    """int(text) for decimal strings of any length, splitting in halves so the work is
+    done by (Karatsuba) multiplications instead of CPython's quadratic parser."""
+    if len(text) <= DECIMAL_LEAF_DIGITS:
+        return int(text)
+    if text[0] in "+-":
+        value = str_to_int(text[1:])
+        return -value if text[0] == "-" else value
+    powers = {}
+
+    def pow10(k):
+        if k not in powers:
+            powers[k] = 10 ** k
+        return powers[k]
+
+    def parse(start, end):
+        if end - start <= DECIMAL_LEAF_DIGITS:
+            return int(text[start:end])
+        mid = (start + end) // 2
+        return parse(start, mid) * pow10(end - mid) + parse(mid, end)
+
+    return parse(0, len(text))
+
+
+def _rechunk(pieces, size: int = CHUNK_SIZE):
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(buffer) if isinstance(piece, str) else b"".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer) if isinstance(buffer[0], str) else b"".join(buffer)
+
+
+def iter_hex(n: int):
+    if n < 0:
+        yield "-"
+        n = -n
+    data = n.to_bytes((n.bit_length() + 7) // 8 or 1, "big")
+    # Chunks cut on byte boundaries, so only the first can carry a leading zero nibble.
+    first = True
+    for start in range(0, len(data), CHUNK_SIZE // 2):
+        text = data[start:start + CHUNK_SIZE // 2].hex()
+        if first:
+            text = text.lstrip("0") or "0"
+            first = False
+        yield text
+
+
+def iter_bytes(n: int):
+    """Big-endian two's complement bytes of n."""
+    data = n.to_bytes((n.bit_length() + 8) // 8, "big", signed=True)
+    view = memoryview(data)
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield bytes(view[start:start + CHUNK_SIZE])
+
+
+def stream_result(result, stream_format: str):
+    if stream_format == "decimal":
+        return _rechunk(iter_decimal_digits(result))
+    if not isinstance(result, int):
+        raise ValueError(f"{stream_format} streaming needs an integer result")
+    if stream_format == "hex":
+        return iter_hex(result)
+    if stream_format == "bytes":
+        return iter_bytes(result)
+    raise ValueError(f"Unknown stream format: {stream_format}")
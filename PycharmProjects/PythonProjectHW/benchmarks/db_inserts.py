@@ -0,0 +1,82 @@
+"""Measure log_operation inserts/sec: one connection per insert vs. the pooled WAL write path.
+
+Each worker process stands in for a uvicorn worker and runs several threads, like
+FastAPI's threadpool. Run from PythonProjectHW:  python -m benchmarks.db_inserts
+"""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import click
+
+from app import db
+
+
+def legacy_log_operation(operation: str, input_data: str, result: str):
+    # The original write path: connect, insert, commit (fsync), close.
+    conn = sqlite3.connect(db.DB_NAME, timeout=30)
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO logs (operation, input, result, timestamp)
+        VALUES (?, ?, ?, ?)
+    ''', (operation, input_data, result, datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def run_worker(db_name: str, mode: str, threads: int, inserts: int):
+    db.DB_NAME = db_name
+    log = legacy_log_operation if mode == "legacy" else db.log_operation
+
+    def insert_many():
+        for i in range(inserts):
+            log("factorial", f"n={i}", str(i))
+
+    pool = [threading.Thread(target=insert_many) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+def run(mode: str, workers: int, threads: int, inserts: int, directory: str) -> float:
+    db_name = os.path.join(directory, f"{mode}.db")
+    if mode == "legacy":
+        conn = sqlite3.connect(db_name)
+        conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                     " operation TEXT, input TEXT, result TEXT, timestamp TEXT)")
+        conn.close()
+    else:
+        db.DB_NAME = db_name
+        db.init_db()
+        db.close_connection()
+    processes = [multiprocessing.Process(target=run_worker, args=(db_name, mode, threads, inserts))
+                 for _ in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    return workers * threads * inserts / elapsed
+
+
+@click.command()
+@click.option("--workers", default=4, help="Worker processes (uvicorn --workers)")
+@click.option("--threads", default=8, help="Threads per worker (threadpool size)")
+@click.option("--inserts", default=250, help="Inserts per thread")
+def main(workers, threads, inserts):
+    """Compare inserts/sec before and after the connection manager"""
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("legacy", "pooled"):
+            rate = run(mode, workers, threads, inserts, directory)
+            click.echo(f"{mode:>8}: {rate:10.0f} inserts/sec "
+                       f"({workers} workers x {threads} threads x {inserts} inserts)")
+
+
+if __name__ == "__main__":
+    main()
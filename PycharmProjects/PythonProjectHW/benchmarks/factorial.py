@@ -0,0 +1,51 @@
+"""Cross-check the factorial engines in app.math_ops against math.factorial and time them.
+
+Run from PythonProjectHW:  python -m benchmarks.factorial
+"""
+import math
+import time
+
+import click
+
+from app.math_ops import FACTORIAL_ENGINES, SMALL_FACTORIAL_LIMIT, factorial_iterative
+
+
+def cross_check(limit: int) -> None:
+    for name, func in FACTORIAL_ENGINES.items():
+        for n in range(limit + 1):
+            if func(n) != math.factorial(n):
+                raise AssertionError(f"{name} engine disagrees with math.factorial at n={n}")
+    click.echo(f"All engines match math.factorial for n = 0..{limit}")
+
+
+def time_call(func, n: int) -> float:
+    start = time.perf_counter()
+    func(n)
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("--check-limit", default=2 * SMALL_FACTORIAL_LIMIT + 1000,
+              help="Cross-check every engine for n up to this value")
+@click.option("--min-exp", default=2, help="Smallest n as a power of ten")
+@click.option("--max-exp", default=6, help="Largest n as a power of ten")
+@click.option("--reference-limit", default=10 ** 5,
+              help="Skip the O(n^2) iterative engine above this n")
+def main(check_limit, min_exp, max_exp, reference_limit):
+    """Verify and time every factorial engine for n = 10^min-exp .. 10^max-exp"""
+    cross_check(check_limit)
+    engines = dict(FACTORIAL_ENGINES, math=math.factorial)
+    click.echo(f"{'n':>10} " + " ".join(f"{name:>12}" for name in engines))
+    for exp in range(min_exp, max_exp + 1):
+        n = 10 ** exp
+        row = []
+        for func in engines.values():
+            if func is factorial_iterative and n > reference_limit:
+                row.append(f"{'skipped':>12}")
+            else:
+                row.append(f"{time_call(func, n):>11.4f}s")
+        click.echo(f"{n:>10} " + " ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compare the Fibonacci engines in app.math_ops.
+
+Run from PythonProjectHW:  python -m benchmarks.fibonacci
+"""
+import time
+
+import click
+
+from app.math_ops import FIBONACCI_ENGINES, fibonacci_iterative
+
+
+def time_call(func, n: int) -> float:
+    start = time.perf_counter()
+    func(n)
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("--min-exp", default=3, help="Smallest n as a power of ten")
+@click.option("--max-exp", default=7, help="Largest n as a power of ten")
+@click.option("--reference-limit", default=10 ** 5,
+              help="Skip the O(n) iterative engine above this n")
+def main(min_exp, max_exp, reference_limit):
+    """Time every Fibonacci engine for n = 10^min-exp .. 10^max-exp"""
+    click.echo(f"{'n':>10} " + " ".join(f"{name:>12}" for name in FIBONACCI_ENGINES))
+    for exp in range(min_exp, max_exp + 1):
+        n = 10 ** exp
+        row = []
+        for func in FIBONACCI_ENGINES.values():
+            if func is fibonacci_iterative and n > reference_limit:
+                row.append(f"{'skipped':>12}")
+            else:
+                row.append(f"{time_call(func, n):>11.4f}s")
+        click.echo(f"{n:>10} " + " ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import pytest
+
+from app import db
+
+
+@pytest.fixture(autouse=True)
+def temporary_database(tmp_path, monkeypatch):
+    # Anything a test logs goes to a throwaway database, not the checked-in operations.db.
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "operations.db"))
+    db.init_db()
+    yield
+    db.close_connection()
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import pytest
+
+from app.executor import MathExecutor, OperationTimeout
+
+
+def test_call_queued_behind_a_timeout_is_retried():
+    # With one worker the later calls wait in the pool's queue while the first times out
+    # and the workers are killed; they must be rerun, not cancelled or failed. (The pool
+    # hands one queued call to the worker early, so queue several.)
+    async def scenario():
+        executor = MathExecutor(mode="pool", workers=1, timeout=10)
+        try:
+            await executor.run(pow, (2, 10), 0)  # start the worker
+            slow = asyncio.ensure_future(executor.run(time.sleep, (5,), 0, timeout=0.3))
+            await asyncio.sleep(0.05)
+            queued = [asyncio.ensure_future(executor.run(pow, (7, n, 10 ** 9 + 7), 0)) for n in range(4)]
+            with pytest.raises(OperationTimeout):
+                await slow
+            return await asyncio.gather(*queued), executor.stats()
+        finally:
+            executor.shutdown()
+
+    result, stats = asyncio.run(scenario())
+    assert result == [pow(7, n, 10 ** 9 + 7) for n in range(4)]
+    assert stats["timeouts"] == 1
+    assert stats["pool_retries"] == 4
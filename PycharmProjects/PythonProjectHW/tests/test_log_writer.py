@@ -0,0 +1,32 @@
+import threading
+import time
+
+from app import log_writer as log_writer_module
+from app.log_writer import OperationLogWriter
+
+
+def test_stop_finishes_while_drop_oldest_overflows(monkeypatch):
+    # A full drop-oldest queue discards its oldest entry for every new row; the stop
+    # sentinel must not be one of them, or the writer thread never exits.
+    monkeypatch.setattr(log_writer_module, "insert_logs", lambda rows: time.sleep(0.001))
+    writer = OperationLogWriter(queue_size=2, batch_size=1, flush_interval=0, overflow="drop-oldest")
+    writer.start()
+    flooding = threading.Event()
+    flooding.set()
+
+    def flood():
+        while flooding.is_set():
+            writer.enqueue("power", "x=2,y=3", "8")
+
+    producers = [threading.Thread(target=flood, daemon=True) for _ in range(4)]
+    for producer in producers:
+        producer.start()
+    time.sleep(0.1)
+    stopper = threading.Thread(target=writer.stop, daemon=True)
+    stopper.start()
+    stopper.join(10)
+    flooding.clear()
+    for producer in producers:
+        producer.join(10)
+    assert not stopper.is_alive(), "stop() hung: the stop sentinel was dropped"
+    assert not writer.running
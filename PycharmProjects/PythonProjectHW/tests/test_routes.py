@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.models import PowerRequest
+from app.routes import batch_power, calculate_power, respond
+
+
+def status_of(coroutine) -> int:
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(coroutine)
+    return raised.value.status_code
+
+
+@pytest.mark.parametrize("x, y", [(0, -1), (2, -1)])
+def test_batch_power_rejects_negative_exact_exponent(x, y):
+    # 0 ** -1 raised ZeroDivisionError and 2 ** -1 returned 0.5, which failed the int
+    # response model; both came back as 500s.
+    assert status_of(batch_power([PowerRequest(x=2, y=3), PowerRequest(x=x, y=y)])) == 400
+
+
+@pytest.mark.parametrize("x, y", [(0, -1), (2, -1)])
+def test_power_rejects_negative_exact_exponent(x, y):
+    assert status_of(calculate_power(PowerRequest(x=x, y=y))) == 400
+
+
+def test_batch_power_rejects_non_invertible_modular_power():
+    assert status_of(batch_power([PowerRequest(x=2, y=-1, mode="mod", modulus=4)])) == 400
+
+
+@pytest.mark.parametrize("stream", ["hex", "bytes"])
+def test_binary_stream_of_a_float_result_is_a_400(stream):
+    with pytest.raises(HTTPException) as raised:
+        respond(0.5, stream)
+    assert raised.value.status_code == 400
@@ -0,0 +1,155 @@
+# Benchmarks for the week 5 tasks at scale.
+#
+#   python benchmark_week5.py anagrams [--words /usr/share/dict/words] [--queries 200]
+#   python benchmark_week5.py attendance [--attendees 1000000] [--sessions 200] [--per-session 20000]
+#
+# anagrams: the anagram index against pairwise count_letters() comparisons; without a
+# word list, a dictionary-sized corpus (235k words) is generated.
+# attendance: the bitmap attendance engine against the set expressions of task 3.
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+import week5
+
+DICT_WORDS = "/usr/share/dict/words"
+
+
+def generate_words(count, seed=7):
+    # Random words of 3-12 letters; a fifth are shuffles of an earlier word, so there
+    # are anagram groups to find.
+    rng = random.Random(seed)
+    words = []
+    seen = set()
+    while len(words) < count:
+        if words and rng.random() < 0.2:
+            letters = list(rng.choice(words))
+            rng.shuffle(letters)
+            word = "".join(letters)
+        else:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def pairwise_anagrams(words, word):
+    # The count_letters() check from task 1, against every word in the corpus.
+    target = week5.count_letters(word.lower())
+    return [other for other in words if other != word and week5.count_letters(other.lower()) == target]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(method, **fields):
+    print(json.dumps({"method": method, **{key: round(value, 6) if isinstance(value, float) else value
+                                            for key, value in fields.items()}}))
+
+
+def bench_anagrams(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.words or (DICT_WORDS if os.path.exists(DICT_WORDS) else None)
+        if path is None:
+            path = os.path.join(tmp, "words.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(word + "\n" for word in generate_words(args.count))
+        with open(path, encoding="utf-8") as f:
+            words = [word for word in map(str.strip, f) if word]
+        queries = random.Random(1).sample(words, min(args.queries, len(words)))
+        print(f"{path}: {len(words)} words, {len(queries)} queries")
+
+        expected, seconds = timed(lambda: [pairwise_anagrams(words, word) for word in queries])
+        report("pairwise", seconds=seconds, per_query_ms=seconds / len(queries) * 1000)
+
+        index, build_seconds = timed(week5.AnagramIndex.from_word_file, path)
+        index_path = os.path.join(tmp, "anagrams.idx")
+        _, save_seconds = timed(index.save, index_path)
+        loaded, load_seconds = timed(week5.AnagramIndex.load, index_path)
+        rounds = 100
+        found, seconds = timed(lambda: [[loaded.anagrams(word) for word in queries] for _ in range(rounds)])
+        report("index", build_seconds=build_seconds, save_seconds=save_seconds, load_seconds=load_seconds,
+               index_mb=round(os.path.getsize(index_path) / 1024 / 1024, 1), signatures=len(loaded.groups),
+               per_query_ms=seconds / (rounds * len(queries)) * 1000,
+               same_results=[sorted(group) for group in found[0]] == [sorted(group) for group in expected])
+
+
+def attendance_log(attendees, sessions, per_session, seed=7):
+    # (session, name) pairs: per_session random attendees for each session.
+    rng = random.Random(seed)
+    for session in range(sessions):
+        for attendee in rng.sample(range(attendees), per_session):
+            yield f"session{session:03d}", f"attendee{attendee:07d}"
+
+
+def set_queries(sessions):
+    # Task 3's expressions, for any number of sessions: all, and "this one minus the others".
+    sets = list(sessions.values())
+    all_sessions = set.intersection(*sets)
+    only_one = set()
+    for i, attendees in enumerate(sets):
+        only_one |= attendees.difference(*sets[:i], *sets[i + 1:])
+    return all_sessions, only_one, sets[0] <= sets[1]
+
+
+def bench_attendance(args):
+    print(f"{args.attendees} attendees, {args.sessions} sessions of {args.per_session}")
+    log = lambda: attendance_log(args.attendees, args.sessions, args.per_session)
+
+    def build_sets():
+        sessions = {}
+        for session, name in log():
+            sessions.setdefault(session, set()).add(name)
+        return sessions
+
+    sessions, build_seconds = timed(build_sets)
+    (all_sessions, only_one, subset), query_seconds = timed(set_queries, sessions)
+    report("sets", build_seconds=build_seconds, query_seconds=query_seconds, all=len(all_sessions),
+           exactly_one=len(only_one), mb=round(sum(map(sys.getsizeof, sessions.values())) / 1024 / 1024, 1))
+    del sessions
+
+    def build_engine():
+        engine = week5.AttendanceEngine()
+        engine.add_log(log())
+        return engine
+
+    def engine_queries(engine):
+        first, second = engine.sessions[:2]
+        return engine.attended_all(), engine.attended_exactly_one(), engine.is_subset(first, second)
+
+    engine, build_seconds = timed(build_engine)
+    (all_bitmap, one_bitmap, engine_subset), query_seconds = timed(engine_queries, engine)
+    report("bitmaps", build_seconds=build_seconds, query_seconds=query_seconds, all=engine.count(all_bitmap),
+           exactly_one=engine.count(one_bitmap),
+           mb=round(sum(sys.getsizeof(engine.bitmap(session)) for session in engine.sessions) / 1024 / 1024, 1),
+           same_results=set(engine.attendees(one_bitmap)) == only_one and engine_subset == subset
+           and set(engine.attendees(all_bitmap)) == all_sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the week 5 tasks")
+    parser.add_argument("task", choices=["anagrams", "attendance"])
+    parser.add_argument("--words", help=f"Word list, one per line (default: {DICT_WORDS} or generated)")
+    parser.add_argument("--count", type=int, default=235000, help="Size of the generated corpus")
+    parser.add_argument("--queries", type=int, default=200, help="Words looked up")
+    parser.add_argument("--attendees", type=int, default=1000000, help="Distinct attendees")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions")
+    parser.add_argument("--per-session", type=int, default=20000, help="Attendees per session")
+    args = parser.parse_args()
+    if args.task == "anagrams":
+        bench_anagrams(args)
+    else:
+        bench_attendance(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# Benchmarks for the week 7 file tasks on a large generated log.
+#
+#   python benchmark_week7.py reverse [--size-mb 1024] [--file big_log.txt]
+#   python benchmark_week7.py filter  [--size-mb 1024] [--file big_roster.txt]
+#   python benchmark_week7.py report  [--size-mb 1024] [--file big_scores.csv]
+#
+# Every method runs in its own process, so the peak memory it reports is its own.
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import week7
+
+NAMES = ["Alice", "Ethan", "Bob", "Uma", "Charlie", "Oscar", "David", "Irene", "Lisa", "Bart",
+         "Homer", "Maggie", "Milhouse", "Ned", "Edna", "Otto", "Apu", "Kent"]
+WORDS = ["GET", "POST", "/api/power", "/api/fibonacci", "/api/factorial", "200", "404", "500",
+         "user", "session", "timeout", "cache", "hit", "miss", "db", "commit"]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def generate_log(path, size_mb):
+    # Log-like lines of 40-120 bytes with CRLF endings, until the file reaches size_mb.
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024:
+        return
+    rng = random.Random(7)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", newline="", buffering=1024 * 1024) as f:
+        line_no = 0
+        while written < target:
+            batch = []
+            for _ in range(10000):
+                line_no += 1
+                words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+                batch.append(f"{line_no:09d} {words}\r\n")
+            chunk = "".join(batch)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def generate_roster(path, size_mb):
+    # One name per line, like students.txt.
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024:
+        return
+    rng = random.Random(7)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", newline="", buffering=1024 * 1024) as f:
+        while written < target:
+            chunk = "\n".join(rng.choices(NAMES, k=100000)) + "\n"
+            f.write(chunk)
+            written += len(chunk)
+
+
+def generate_scores(path, size_mb):
+    # name,score records with unique names, like the student_scores dict.
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024:
+        return
+    rng = random.Random(7)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", newline="", buffering=1024 * 1024) as f:
+        f.write("name,score\n")
+        student = 0
+        while written < target:
+            batch = []
+            for _ in range(10000):
+                student += 1
+                batch.append(f"{rng.choice(NAMES)}{student},{rng.randint(40, 100)}\n")
+            chunk = "".join(batch)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def reverse_chunks(path, out_path):
+    with open(out_path, "wb", buffering=1024 * 1024) as out:
+        week7.write_lines_reversed(path, out)
+
+
+def reverse_readlines(path, out_path):
+    # The original approach: everything in memory at once.
+    with open(path, "r") as f:
+        lines = f.readlines()
+    with open(out_path, "w") as f:
+        f.writelines(reversed(lines))
+
+
+def filter_loop(path, out_path):
+    # The original vowel filter: one strip, one check and one write per line.
+    vowels = {'A', 'E', 'I', 'O', 'U'}
+    with open(path, "r") as infile, open(out_path, "w") as outfile:
+        for line in infile:
+            name = line.strip()
+            if name and name[0].upper() in vowels:
+                outfile.write(name + "\n")
+
+
+def filter_pipeline(path, out_path, workers=None):
+    with open(out_path, "wb", buffering=1024 * 1024) as out:
+        week7.filter_lines(path, out, week7.PrefixFilter("AEIOU"), workers=workers)
+
+
+def report_dict(path, out_path):
+    # The original report: every record in a dict, sorted and joined in memory.
+    data = dict(week7.read_score_records(path))
+    passed = {name: score for name, score in data.items() if score >= 80}
+    sorted_report = sorted(passed.items(), key=lambda x: x[1], reverse=True)
+    report_lines = ["\n== Task 3: Student Report (Score >= 80) =="]
+    for name, score in sorted_report:
+        report_lines.append(f"{name:10} - {score}")
+    with open(out_path, "w") as f:
+        f.write("\n".join(report_lines))
+
+
+def report_stream(path, out_path, top=None):
+    with open(out_path, "w", buffering=1024 * 1024) as f:
+        f.writelines(line + "\n" for line in week7.iter_report_lines(week7.read_score_records(path), top))
+
+
+# task -> (input generator, default file, {method: function(path, out_path)})
+TASKS = {
+    "reverse": (generate_log, "big_log.txt", {"chunks": reverse_chunks, "readlines": reverse_readlines}),
+    "filter": (generate_roster, "big_roster.txt", {
+        "loop": filter_loop,
+        "pipeline-1": lambda path, out_path: filter_pipeline(path, out_path, workers=1),
+        "pipeline": filter_pipeline,
+    }),
+    "report": (generate_scores, "big_scores.csv", {
+        "dict": report_dict,
+        "top-100": lambda path, out_path: report_stream(path, out_path, top=100),
+        "external": report_stream,
+    }),
+}
+
+
+def run_one(task, method, path):
+    out_path = f"{path}.{method}.out"
+    start = time.perf_counter()
+    TASKS[task][2][method](path, out_path)
+    elapsed = time.perf_counter() - start
+    output_mb = os.path.getsize(out_path) / 1024 / 1024
+    os.remove(out_path)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(json.dumps({"method": method, "seconds": round(elapsed, 2), "mb_per_second": round(size_mb / elapsed, 1),
+                      "output_mb": round(output_mb, 1), "peak_rss_mb": peak_rss_mb(), "cpus": os.cpu_count()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the week 7 file tasks")
+    parser.add_argument("task", choices=list(TASKS))
+    parser.add_argument("--size-mb", type=int, default=1024, help="Size of the generated input")
+    parser.add_argument("--file", help="Generated input (reused if big enough)")
+    parser.add_argument("--method", action="append", help="Methods to run (default: all of the task's)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated log afterwards")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    generate, default_file, methods = TASKS[args.task]
+    args.file = args.file or default_file
+    unknown = set(args.method or ()) - set(methods)
+    if unknown:
+        parser.error(f"unknown {args.task} method(s): {', '.join(sorted(unknown))}; choose from {', '.join(methods)}")
+    if args.child:
+        run_one(args.task, args.method[0], args.file)
+        return
+    generate(args.file, args.size_mb)
+    print(f"{args.file}: {os.path.getsize(args.file) / 1024 / 1024:.0f} MB")
+    for method in args.method or list(methods):
+        subprocess.run([sys.executable, __file__, args.task, "--file", args.file, "--method", method,
+                        "--child"], check=True)
+    if not args.keep:
+        os.remove(args.file)
+
+
+if __name__ == "__main__":
+    main()
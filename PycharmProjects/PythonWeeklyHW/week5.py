@@ -1,9 +1,10 @@
 # WEEK 5 TASK: Dictionaries, Sets, and Comprehensions
+import argparse
+import csv
+import os
+import pickle
+import sys
 
-# 1. Are two words anagrams?
-print("== 1. Anagram Checker ==")
-word1 = "listen"
-word2 = "silent"
 
 def count_letters(word):
     freq = {}
@@ -11,89 +12,327 @@ def count_letters(word):
         freq[letter] = freq.get(letter, 0) + 1
     return freq
 
-dict1 = count_letters(word1)
-dict2 = count_letters(word2)
-
-print("Original frequency dictionaries:")
-print(f"{word1}: {dict1}")
-print(f"{word2}: {dict2}")
-print("Are they anagrams?", dict1 == dict2)
-
-# Modify one dictionary
-del dict1['l']
-print("\nAfter deleting 'l' from first dictionary:")
-print(f"{word1}: {dict1}")
-print(f"{word2}: {dict2}")
-
-# 2. Invert dictionary with duplicates in values
-print("\n== 2. Invert Dictionary ==")
-grades = {
-    "Alice": "A",
-    "Bob": "B",
-    "Charlie": "A",
-    "Diana": "C"
-}
-
-inverted = {}
-for student, grade in grades.items():
-    inverted.setdefault(grade, []).append(student)
-
-print("Inverted dictionary:", inverted)
-
-# 3. Set Analysis for Conference Attendees
-print("\n== 3. Set Analysis ==")
-testing = {"Ana", "Bob", "Charlie", "Diana"}
-development = {"Charlie", "Eve", "Frank", "Ana"}
-devops = {"George", "Ana", "Bob", "Eve"}
-
-# Attendees in all sessions
-all_three = testing & development & devops
-print("Attended all three sessions:", all_three)
-
-# Only one session attendees
-only_one = (
-    (testing - development - devops) |
-    (development - testing - devops) |
-    (devops - testing - development)
-)
-print("Attended only one session:", only_one)
-
-# Are all testing attendees in devops?
-print("All testing attendees in devops:", testing <= devops)
-
-# All unique attendees sorted
-all_attendees = sorted(testing | development | devops)
-print("All unique attendees sorted:", all_attendees)
-
-# Copy development and clear original
-development_copy = development.copy()
-development.clear()
-print("Development (after clear):", development)
-print("Copied development:", development_copy)
-
-# 4. Create Data with Comprehensions
-print("\n== 4. Comprehensions ==")
-
-# List of squares from 1 to 10
-squares = [x**2 for x in range(1, 11)]
-print("Squares 1-10:", squares)
-
-# Set of numbers divisible by 7 from 1 to 50
-div7 = {x for x in range(1, 51) if x % 7 == 0}
-print("Divisible by 7 (1–50):", div7)
-
-# Dictionary of passed students
-score = {"Alice": 85, "Bob": 59, "Charlie": 92}
-passed = {name: val for name, val in score.items() if val >= 60}
-print("Passed students:", passed)
-
-# Nested dictionary for weekly attendance
-students = ["Michael", "David", "Liza"]
-weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri"]
-attendance = {
-    student: {day: (day in ["Mon", "Wed"]) for day in weekdays}
-    for student in students
-}
-print("Weekly attendance log:")
-for student, days in attendance.items():
-    print(f"{student}: {days}")
+
+# Anagram index: instead of comparing count_letters() dicts two words at a time, every
+# word is filed under a signature that all of its anagrams share (its letters, sorted),
+# so "all anagrams of X" is one dict lookup.
+def anagram_signature(word):
+    return "".join(sorted(word.lower()))
+
+
+class AnagramIndex:
+    """Words grouped by anagram signature."""
+
+    def __init__(self, words=()):
+        # signature -> words, in the order they were added; tuples, which pickle loads
+        # several times faster than lists (groups are a word or two, so copying is cheap)
+        self.groups = {}
+        self.add_words(words)
+
+    def add(self, word):
+        signature = anagram_signature(word)
+        group = self.groups.get(signature, ())
+        if word not in group:
+            self.groups[signature] = group + (word,)
+
+    def add_words(self, words):
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def from_word_file(cls, path):
+        """Index a word list with one word per line (blank lines are skipped)."""
+        with open(path, encoding="utf-8") as f:
+            return cls(word for word in map(str.strip, f) if word)
+
+    def anagrams(self, word):
+        """The indexed anagrams of word, not counting word itself."""
+        return [other for other in self.groups.get(anagram_signature(word), ()) if other != word]
+
+    def __len__(self):
+        return sum(map(len, self.groups.values()))
+
+    def save(self, path):
+        # Written next to path and renamed over it, so a reader never sees half a file.
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.groups, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save(); pickle, so only load files you wrote."""
+        index = cls()
+        with open(path, "rb") as f:
+            index.groups = pickle.load(f)
+        return index
+
+
+# Attendance engine: the set analysis of task 3 for millions of attendees and hundreds
+# of sessions. Names are interned to ids 0, 1, 2, ... and a session is a bitmap with
+# bit i set if attendee i was there, so &, | and ~ work on whole sessions at once and
+# int.bit_count() counts the result.
+class AttendanceEngine:
+    """Sessions as bitmaps over interned attendee ids."""
+
+    def __init__(self):
+        self.ids = {}  # name -> id
+        self.names = []  # id -> name
+        # Sessions are built in bytearrays (setting a bit in a Python int copies it) and
+        # turned into ints when first queried.
+        self._building = {}  # session -> bytearray bitmap
+        self._bitmaps = {}  # session -> int bitmap, for sessions unchanged since
+
+    def intern(self, name):
+        attendee = self.ids.get(name)
+        if attendee is None:
+            attendee = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return attendee
+
+    def record(self, session, name):
+        attendee = self.intern(name)
+        bits = self._building.get(session)
+        if bits is None:
+            bits = self._building[session] = bytearray()
+        byte = attendee >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(max(byte + 1 - len(bits), len(bits))))
+        bits[byte] |= 1 << (attendee & 7)
+        self._bitmaps.pop(session, None)
+
+    def add_session(self, session, names):
+        self._building.setdefault(session, bytearray())
+        for name in names:
+            self.record(session, name)
+
+    def add_log(self, records):
+        """Record an iterable of (session, name) pairs, like read_attendance_log() yields."""
+        # record(), inlined: this loop runs once per line of a log with millions of lines.
+        ids, names, building = self.ids, self.names, self._building
+        for session, name in records:
+            attendee = ids.get(name)
+            if attendee is None:
+                attendee = ids[name] = len(names)
+                names.append(name)
+            bits = building.get(session)
+            if bits is None:
+                bits = building[session] = bytearray()
+            byte = attendee >> 3
+            if byte >= len(bits):
+                bits.extend(bytes(max(byte + 1 - len(bits), len(bits))))
+            bits[byte] |= 1 << (attendee & 7)
+        self._bitmaps.clear()
+
+    @property
+    def sessions(self):
+        return list(self._building)
+
+    def bitmap(self, session):
+        bitmap = self._bitmaps.get(session)
+        if bitmap is None:
+            bitmap = self._bitmaps[session] = int.from_bytes(self._building.get(session, b""), "little")
+        return bitmap
+
+    def _bitmaps_of(self, sessions):
+        return [self.bitmap(session) for session in (self.sessions if sessions is None else sessions)]
+
+    def attended_any(self, sessions=None):
+        result = 0
+        for bitmap in self._bitmaps_of(sessions):
+            result |= bitmap
+        return result
+
+    def attended_all(self, sessions=None):
+        bitmaps = self._bitmaps_of(sessions)
+        if not bitmaps:
+            return 0
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result &= bitmap
+        return result
+
+    def attended_exactly_one(self, sessions=None):
+        once = more = 0
+        for bitmap in self._bitmaps_of(sessions):
+            more |= once & bitmap
+            once ^= bitmap
+        return once & ~more
+
+    def is_subset(self, session, other):
+        """True if everyone who attended session also attended other."""
+        return self.bitmap(session) & ~self.bitmap(other) == 0
+
+    @staticmethod
+    def count(bitmap):
+        return bitmap.bit_count()
+
+    def attendees(self, bitmap):
+        """The names of the attendees set in bitmap, in id (first seen) order."""
+        names = []
+        for byte_index, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+            while byte:
+                low = byte & -byte
+                names.append(self.names[byte_index * 8 + low.bit_length() - 1])
+                byte ^= low
+        return names
+
+
+def read_attendance_log(path):
+    """(session, name) pairs from a "session,name" CSV file, one attendance per row."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2:
+                yield row[0], row[1]
+
+
+def main():
+    # 1. Are two words anagrams?
+    print("== 1. Anagram Checker ==")
+    word1 = "listen"
+    word2 = "silent"
+
+    dict1 = count_letters(word1)
+    dict2 = count_letters(word2)
+
+    print("Original frequency dictionaries:")
+    print(f"{word1}: {dict1}")
+    print(f"{word2}: {dict2}")
+    print("Are they anagrams?", dict1 == dict2)
+
+    # Modify one dictionary
+    del dict1['l']
+    print("\nAfter deleting 'l' from first dictionary:")
+    print(f"{word1}: {dict1}")
+    print(f"{word2}: {dict2}")
+
+    # 2. Invert dictionary with duplicates in values
+    print("\n== 2. Invert Dictionary ==")
+    grades = {
+        "Alice": "A",
+        "Bob": "B",
+        "Charlie": "A",
+        "Diana": "C"
+    }
+
+    inverted = {}
+    for student, grade in grades.items():
+        inverted.setdefault(grade, []).append(student)
+
+    print("Inverted dictionary:", inverted)
+
+    # 3. Set Analysis for Conference Attendees
+    print("\n== 3. Set Analysis ==")
+    testing = {"Ana", "Bob", "Charlie", "Diana"}
+    development = {"Charlie", "Eve", "Frank", "Ana"}
+    devops = {"George", "Ana", "Bob", "Eve"}
+
+    # Attendees in all sessions
+    all_three = testing & development & devops
+    print("Attended all three sessions:", all_three)
+
+    # Only one session attendees
+    only_one = (
+        (testing - development - devops) |
+        (development - testing - devops) |
+        (devops - testing - development)
+    )
+    print("Attended only one session:", only_one)
+
+    # Are all testing attendees in devops?
+    print("All testing attendees in devops:", testing <= devops)
+
+    # All unique attendees sorted
+    all_attendees = sorted(testing | development | devops)
+    print("All unique attendees sorted:", all_attendees)
+
+    # The same questions answered with bitmaps
+    engine = AttendanceEngine()
+    for session, names in [("testing", testing), ("development", development), ("devops", devops)]:
+        engine.add_session(session, sorted(names))
+    print("Attended all three sessions (bitmaps):", engine.attendees(engine.attended_all()))
+    print("Attended only one session (bitmaps):", engine.attendees(engine.attended_exactly_one()))
+    print("All testing attendees in devops (bitmaps):", engine.is_subset("testing", "devops"))
+
+    # Copy development and clear original
+    development_copy = development.copy()
+    development.clear()
+    print("Development (after clear):", development)
+    print("Copied development:", development_copy)
+
+    # 4. Create Data with Comprehensions
+    print("\n== 4. Comprehensions ==")
+
+    # List of squares from 1 to 10
+    squares = [x**2 for x in range(1, 11)]
+    print("Squares 1-10:", squares)
+
+    # Set of numbers divisible by 7 from 1 to 50
+    div7 = {x for x in range(1, 51) if x % 7 == 0}
+    print("Divisible by 7 (1–50):", div7)
+
+    # Dictionary of passed students
+    score = {"Alice": 85, "Bob": 59, "Charlie": 92}
+    passed = {name: val for name, val in score.items() if val >= 60}
+    print("Passed students:", passed)
+
+    # Nested dictionary for weekly attendance
+    students = ["Michael", "David", "Liza"]
+    weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+    attendance = {
+        student: {day: (day in ["Mon", "Wed"]) for day in weekdays}
+        for student in students
+    }
+    print("Weekly attendance log:")
+    for student, days in attendance.items():
+        print(f"{student}: {days}")
+
+    # Anagrams of a word among many, with one lookup
+    index = AnagramIndex(["listen", "silent", "enlist", "tinsel", "google", "inlets"])
+    print("\nAnagrams of 'listen':", index.anagrams("listen"))
+
+
+def command_line(argv):
+    parser = argparse.ArgumentParser(prog="week5.py", description="Week 5 dictionary and set tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("anagram-index", help="Index a word list (one word per line) and save it")
+    build.add_argument("words", help="Word list file")
+    build.add_argument("index", help="Index file to write")
+
+    find = commands.add_parser("anagrams", help="Print the anagrams of words")
+    find.add_argument("words", nargs="+", help="Words to look up")
+    source = find.add_mutually_exclusive_group(required=True)
+    source.add_argument("--index", help="Index file written by anagram-index")
+    source.add_argument("--word-file", help="Word list to index first")
+
+    attendance = commands.add_parser("attendance", help="Summarize a session,name attendance log")
+    attendance.add_argument("log", help="CSV attendance log, one session,name row per attendance")
+
+    args = parser.parse_args(argv)
+    if args.command == "attendance":
+        engine = AttendanceEngine()
+        engine.add_log(read_attendance_log(args.log))
+        print(f"{len(engine.names)} attendees, {len(engine.sessions)} sessions")
+        print("Attended all sessions:", engine.count(engine.attended_all()))
+        print("Attended exactly one session:", engine.count(engine.attended_exactly_one()))
+        return
+    if args.command == "anagram-index":
+        index = AnagramIndex.from_word_file(args.words)
+        index.save(args.index)
+        print(f"{len(index)} words, {len(index.groups)} signatures -> {args.index}")
+        return
+    index = AnagramIndex.load(args.index) if args.index else AnagramIndex.from_word_file(args.word_file)
+    for word in args.words:
+        print(f"{word}: {' '.join(index.anagrams(word))}")
+
+
+if __name__ == "__main__":
+    # With arguments, a command line tool:
+    #   python week5.py anagram-index WORDS INDEX
+    #   python week5.py anagrams (--index INDEX | --word-file WORDS) WORD ...
+    #   python week5.py attendance LOG
+    if len(sys.argv) > 1:
+        command_line(sys.argv[1:])
+    else:
+        main()
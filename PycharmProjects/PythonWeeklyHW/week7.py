@@ -1,4 +1,14 @@
 # FILE: weekly_file_tasks.py
+import argparse
+import csv
+import heapq
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # 1. File Filtering with Context Manager
 def filter_names_starting_with_vowel():
@@ -11,16 +21,215 @@ def filter_names_starting_with_vowel():
             "Alice", "Ethan", "Bob", "Uma", "Charlie", "Oscar", "David", "Irene"
         ]))
 
-    # Step 2: Read and write names that start with vowels
-    with open("students.txt", "r") as infile, open("filtered.txt", "w") as outfile:
-        for line in infile:
-            name = line.strip()
-            if name and name[0].upper() in vowels:
-                outfile.write(name + "\n")
-                print(f"Written to filtered.txt: {name}")
+    # Step 2: Keep the names that start with vowels (through the chunked filter below)
+    with open("filtered.txt", "wb") as outfile:
+        filter_lines("students.txt", outfile, PrefixFilter(vowels), workers=1)
+    with open("filtered.txt", "r") as f:
+        for line in f:
+            print(f"Written to filtered.txt: {line.strip()}")
+
+
+# Reusable line filter: the loop above, for files too big for one process.
+# The input is cut into newline-aligned chunks, each chunk is filtered in a worker
+# process, and the kept lines are written back in input order, one write per chunk.
+FILTER_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+_TRAILING_BLANKS = re.compile(rb"[ \t\r\x0b\x0c]+$", re.MULTILINE)
+
+
+class PrefixFilter:
+    """Keep lines whose first non-blank characters are one of prefixes, written stripped
+    (like the loop's name.strip()), so trailing spaces and a CRLF's "\r" are dropped."""
+
+    def __init__(self, prefixes, ignore_case=True):
+        alternatives = b"|".join(re.escape(prefix.encode()) for prefix in prefixes)
+        # One regex over a whole chunk is much cheaper than a Python call per line: the
+        # group is the line from its prefix on, and _TRAILING_BLANKS strips the kept
+        # lines' ends in one pass over the joined output.
+        self.regex = re.compile(rb"^[ \t\r\x0b\x0c]*((?:" + alternatives + rb")[^\n]*)",
+                                re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+    def __call__(self, line):
+        return self.regex.match(line) is not None
+
+    def keep(self, data):
+        return _TRAILING_BLANKS.sub(b"", _join_lines(self.regex.findall(data)))
+
+
+class RegexFilter:
+    """Keep lines in which the regular expression matches anywhere."""
+
+    def __init__(self, pattern, ignore_case=False):
+        self.regex = re.compile(pattern.encode(), re.IGNORECASE if ignore_case else 0)
+
+    def __call__(self, line):
+        return self.regex.search(line) is not None
+
+    def keep(self, data):
+        return _join_lines(filter(self.regex.search, _split_lines(data)))
+
+
+def _split_lines(data):
+    lines = data.split(b"\n")
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _join_lines(lines):
+    lines = list(lines)
+    return b"\n".join(lines) + b"\n" if lines else b""
+
+
+def filter_chunk(data, predicate):
+    """The lines of data (bytes) for which predicate(line) is true, each ending in a newline.
+
+    predicate gets each line without its "\n" (a "\r" of a CRLF ending is still there);
+    predicates with a keep(data) method filter the whole chunk themselves.
+    """
+    keep = getattr(predicate, "keep", None)
+    if keep is not None:
+        return keep(data)
+    return _join_lines(filter(predicate, _split_lines(data)))
+
+
+def newline_aligned_ranges(path, chunk_size=FILTER_CHUNK_SIZE):
+    """(start, end) byte ranges covering the file, each ending just after a newline (or at EOF)."""
+    size = os.path.getsize(path)
+    ranges, start = [], 0
+    with open(path, "rb") as f:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def filter_range(path, start, end, predicate):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return filter_chunk(f.read(end - start), predicate)
+
+
+def newline_aligned_blocks(stream, chunk_size=FILTER_CHUNK_SIZE):
+    """Read a binary stream in blocks of about chunk_size that end on a newline (or at EOF)."""
+    pending = b""
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        data = pending + data
+        cut = data.rfind(b"\n") + 1
+        pending = data[cut:]
+        if cut:
+            yield data[:cut]
+    if pending:
+        yield pending
+
+
+def ordered_map(func, arg_tuples, workers):
+    """func(*args) for each args, in order; with workers > 1 in a process pool, keeping at
+    most 2 * workers calls in flight so a long input is never read far ahead of the output."""
+    if workers <= 1:
+        for args in arg_tuples:
+            yield func(*args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for args in arg_tuples:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def filter_lines(source, out, predicate, workers=None, chunk_size=FILTER_CHUNK_SIZE):
+    """Write the lines of source (a path, or "-" for stdin) that satisfy predicate to the
+    binary stream out, in their original order. workers defaults to the number of CPUs.
+
+    With workers > 1 the predicate is sent to worker processes, so it must be picklable:
+    a PrefixFilter, a RegexFilter or a module-level function, not a lambda or a closure.
+    """
+    workers = workers or os.cpu_count() or 1
+    if source == "-":
+        jobs = ((block, predicate) for block in newline_aligned_blocks(sys.stdin.buffer, chunk_size))
+        results = ordered_map(filter_chunk, jobs, workers)
+    else:
+        jobs = ((source, start, end, predicate) for start, end in newline_aligned_ranges(source, chunk_size))
+        results = ordered_map(filter_range, jobs, workers)
+    for result in results:
+        out.write(result)
 
 
 # 2. Reverse File Content
+REVERSE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_lines_reversed(path, chunk_size=REVERSE_CHUNK_SIZE):
+    """Yield the lines of a file last to first, as bytes with their own line endings.
+
+    The file is read in fixed-size chunks backwards from EOF, so memory stays at about
+    one chunk plus the longest line however big the file is. Lines end at b"\n", so
+    "\r\n" endings come out intact; a last line without a newline is yielded as is.
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        pending = b""  # start of a line that begins before the chunks read so far
+        while position > 0:
+            size = min(chunk_size, position)
+            position -= size
+            f.seek(position)
+            parts = (f.read(size) + pending).split(b"\n")
+            if len(parts) == 1:
+                pending = parts[0]
+                continue
+            if parts[-1]:
+                yield parts[-1]
+            for i in range(len(parts) - 2, 0, -1):
+                yield parts[i] + b"\n"
+            pending = parts[0] + b"\n"
+        if pending:
+            yield pending
+
+
+def write_lines_reversed(path, out, chunk_size=REVERSE_CHUNK_SIZE):
+    """Write the lines of path to the binary stream out in reverse order (like tail -r).
+
+    A last line without a newline gets the file's own line ending, so it doesn't run
+    into the line that follows it in the output.
+    """
+    lines = iter_lines_reversed(path, chunk_size)
+    first = next(lines, None)
+    if first is None:
+        return
+    second = next(lines, None)
+    if second is not None and not first.endswith(b"\n"):
+        first += b"\r\n" if second.endswith(b"\r\n") else b"\n"
+    out.write(first)
+    if second is not None:
+        out.write(second)
+    out.writelines(lines)
+
+
+def tail_r(paths):
+    """tail -r: print the lines of each file (or stdin, for no paths or "-") in reverse order."""
+    out = sys.stdout.buffer
+    for path in paths or ["-"]:
+        if path == "-":
+            lines = sys.stdin.buffer.readlines()  # a pipe cannot be read backwards
+            out.writelines(reversed(lines))
+        else:
+            write_lines_reversed(path, out)
+    out.flush()
+
+
 def reverse_log_file():
     print("\n== Task 2: Reverse Log File Content ==")
 
@@ -35,25 +244,102 @@ def reverse_log_file():
         ])
     print("log.txt created.")
 
-    # Step 2: Read and reverse lines
-    with open("log.txt", "r") as f:
-        lines = f.readlines()
-
-    with open("reversed_log.txt", "w") as f:
-        f.writelines(reversed(lines))
+    # Step 2: Stream the lines from the end of the file, without loading all of it
+    with open("reversed_log.txt", "wb", buffering=1024 * 1024) as f:
+        write_lines_reversed("log.txt", f)
     print("Reversed content written to reversed_log.txt.")
 
 
 # 3. Student Report Generator (modularized-style function)
 def generate_report(data: dict) -> str:
-    passed = {name: score for name, score in data.items() if score >= 80}
-    sorted_report = sorted(passed.items(), key=lambda x: x[1], reverse=True)
+    return "\n".join(iter_report_lines(data.items()))
+
+
+# Streaming report: the same lines for score records that do not fit in memory.
+# With a top-k only k records are ever held (a bounded heap); without one, sorted
+# runs of REPORT_RUN_SIZE records are spilled to temporary files and merged lazily.
+REPORT_RUN_SIZE = 1000000
+
+
+def read_score_records(source):
+    """(name, score) pairs from a "name,score" CSV file, or stdin for "-".
+
+    Rows without a numeric score, like a header, are skipped.
+    """
+    if source == "-":
+        yield from _score_rows(sys.stdin)
+        return
+    with open(source, newline="") as f:
+        yield from _score_rows(f)
+
 
-    report_lines = ["\n== Task 3: Student Report (Score >= 80) =="]
-    for name, score in sorted_report:
-        report_lines.append(f"{name:10} - {score}")
+def _score_rows(lines):
+    for row in csv.reader(lines):
+        if len(row) < 2:
+            continue
+        try:
+            score = int(row[1])
+        except ValueError:
+            try:
+                score = float(row[1])
+            except ValueError:
+                continue
+        yield row[0], score
 
-    return "\n".join(report_lines)
+
+def _rank_key(item):
+    # item = (score, input position, name): highest score first, ties in input order,
+    # which is the order sorted(..., reverse=True) keeps them in.
+    return -item[0], item[1]
+
+
+def _spill_run(run):
+    f = tempfile.TemporaryFile("w+", encoding="utf-8")
+    f.writelines(json.dumps(item) + "\n" for item in run)
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    for line in f:
+        yield tuple(json.loads(line))
+
+
+def external_sort_scores(records, run_size=REPORT_RUN_SIZE):
+    """(name, score) records ordered by score, highest first and ties in input order."""
+    runs = []
+    try:
+        run = []
+        for position, (name, score) in enumerate(records):
+            run.append((score, position, name))
+            if len(run) >= run_size:
+                run.sort(key=_rank_key)
+                runs.append(_spill_run(run))
+                run = []
+        run.sort(key=_rank_key)
+        if runs:
+            runs.append(_spill_run(run))
+            run = heapq.merge(*(_read_run(f) for f in runs), key=_rank_key)
+        for score, _, name in run:
+            yield name, score
+    finally:
+        for f in runs:
+            f.close()
+
+
+def iter_report_lines(records, top=None, threshold=80, run_size=REPORT_RUN_SIZE):
+    """Yield the report's lines one at a time for an iterable of (name, score) records.
+
+    Only the ``top`` best students are reported if it is given.
+    """
+    yield f"\n== Task 3: Student Report (Score >= {threshold}) =="
+    passed = ((name, score) for name, score in records if score >= threshold)
+    if top is None:
+        ranked = external_sort_scores(passed, run_size)
+    else:
+        ranked = heapq.nlargest(top, passed, key=lambda record: record[1])
+    for name, score in ranked:
+        yield f"{name:10} - {score}"
 
 
 def main():
@@ -76,5 +362,51 @@ def main():
     print(report)
 
 
+def command_line(argv):
+    parser = argparse.ArgumentParser(prog="week7.py", description="Week 7 file tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reverse = commands.add_parser("tail-r", help="Print files line by line in reverse, like tail -r")
+    reverse.add_argument("files", nargs="*", help='Files to reverse ("-" or none: stdin)')
+
+    keep = commands.add_parser("filter", help="Print the lines of a file (or stdin) that match")
+    keep.add_argument("file", nargs="?", default="-", help='Input file ("-" or none: stdin)')
+    match = keep.add_mutually_exclusive_group(required=True)
+    match.add_argument("--prefix", action="append", help="Keep lines starting with this (repeatable)")
+    match.add_argument("--regex", help="Keep lines this regular expression matches")
+    keep.add_argument("--ignore-case", action="store_true", help="Match case-insensitively")
+    keep.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    keep.add_argument("--chunk-mb", type=float, default=FILTER_CHUNK_SIZE / 1024 / 1024,
+                      help="Size of the chunks handed to workers")
+
+    report = commands.add_parser("report", help="Print the student report for a name,score CSV file (or stdin)")
+    report.add_argument("file", nargs="?", default="-", help='Input file ("-" or none: stdin)')
+    report.add_argument("--top", type=int, help="Only the best TOP students")
+    report.add_argument("--threshold", type=int, default=80, help="Lowest passing score")
+
+    args = parser.parse_args(argv)
+    if args.command == "tail-r":
+        tail_r(args.files)
+        return
+    if args.command == "report":
+        records = read_score_records(args.file)
+        sys.stdout.writelines(line + "\n" for line in iter_report_lines(records, args.top, args.threshold))
+        return
+    if args.prefix:
+        predicate = PrefixFilter(args.prefix, ignore_case=args.ignore_case)
+    else:
+        predicate = RegexFilter(args.regex, ignore_case=args.ignore_case)
+    out = sys.stdout.buffer
+    filter_lines(args.file, out, predicate, args.workers, int(args.chunk_mb * 1024 * 1024))
+    out.flush()
+
+
 if __name__ == "__main__":
-    main()
+    # With arguments, a command line tool:
+    #   python week7.py tail-r [FILE ...]
+    #   python week7.py filter (--prefix P ... | --regex R) [FILE]
+    #   python week7.py report [--top K] [FILE]
+    if len(sys.argv) > 1:
+        command_line(sys.argv[1:])
+    else:
+        main()